@@ -1,31 +1,49 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from itertools import combinations
 
 import numpy as np
 
-from sim_contribution.bitmask import iter_bits
+from sim_contribution.bitmask import INT64_MASK_BITS, members_array
+from sim_contribution.coalitions import Coalitions
+from sim_contribution.counters import CoalitionCounts
+
+# Up/down counts indexed by coalition mask: either a dense (1 << n,) array or a compact
+# per-coalition store.
+CountLookup = np.ndarray | CoalitionCounts
 
 
 @dataclass(frozen=True)
 class GreedyResult:
     partition: list[int]
+    indices: list[int] | None = None  # coalition indices of `partition`, when known
+
+
+@dataclass(frozen=True)
+class GreedyEngine:
+    masks: np.ndarray  # (m,) int64
+    members: np.ndarray  # (m, 3) int64, padded with -1
+    player_coalitions: list[np.ndarray]  # len n; coalition indices containing each player
 
 
 def _candidates_from_rmask(rmask: int) -> list[int]:
-    members = list(iter_bits(rmask))
-    cands: list[int] = []
-    for i in members:
-        cands.append(1 << i)
-    for i, j in combinations(members, 2):
-        cands.append((1 << i) | (1 << j))
-    for i, j, k in combinations(members, 3):
-        cands.append((1 << i) | (1 << j) | (1 << k))
-    return cands
-
-
-def greedy_partition_ud(n: int, up: np.ndarray, down: np.ndarray, rng: np.random.Generator) -> GreedyResult:
+    # Singletons, pairs and triples of rmask's players in `combinations` order over ascending
+    # players; built with array ops rather than one Python step per bit and per candidate.
+    dtype = np.int64 if rmask.bit_length() <= INT64_MASK_BITS else object
+    members = members_array(np.array([rmask], dtype=dtype))[0]
+    singles = np.array(1, dtype=dtype) << members.astype(dtype)
+    k = singles.shape[0]
+    i, j = np.triu_indices(k, 1)
+    # Row-major nonzero of a < b < c lists the triples in lexicographic order.
+    r = np.arange(k)
+    a, b, c = np.nonzero(
+        (r[:, None, None] < r[None, :, None]) & (r[None, :, None] < r[None, None, :])
+    )
+    cands = np.concatenate([singles, singles[i] | singles[j], singles[a] | singles[b] | singles[c]])
+    return [int(s) for s in cands]
+
+
+def greedy_partition_ud(n: int, up: CountLookup, down: CountLookup, rng: np.random.Generator) -> GreedyResult:
     rmask = (1 << n) - 1
     partition: list[int] = []
     while rmask:
@@ -45,7 +63,7 @@ def greedy_partition_ud(n: int, up: np.ndarray, down: np.ndarray, rng: np.random
     return GreedyResult(partition=partition)
 
 
-def greedy_partition_du(n: int, up: np.ndarray, down: np.ndarray, rng: np.random.Generator) -> GreedyResult:
+def greedy_partition_du(n: int, up: CountLookup, down: CountLookup, rng: np.random.Generator) -> GreedyResult:
     rmask = (1 << n) - 1
     partition: list[int] = []
     while rmask:
@@ -75,3 +93,48 @@ def greedy_partition_random(n: int, rng: np.random.Generator) -> GreedyResult:
         rmask ^= chosen
     return GreedyResult(partition=partition)
 
+
+def build_greedy_engine(coalitions: Coalitions) -> GreedyEngine:
+    m = int(coalitions.members.shape[0])
+    n = int(np.count_nonzero(coalitions.sizes == 1))
+    # Group coalition indices by member with one stable sort instead of n scans over all coalitions.
+    flat = coalitions.members.ravel()
+    valid = flat >= 0
+    owners = np.repeat(np.arange(m), coalitions.members.shape[1])[valid]
+    players = flat[valid]
+    order = np.argsort(players, kind="stable")
+    counts = np.bincount(players, minlength=n)
+    player_coalitions = np.split(owners[order], np.cumsum(counts)[:-1])
+    return GreedyEngine(
+        masks=coalitions.masks,
+        members=coalitions.members,
+        player_coalitions=player_coalitions,
+    )
+
+
+def greedy_engine_max(
+    engine: GreedyEngine, score: np.ndarray | None, rng: np.random.Generator
+) -> GreedyResult:
+    # Repeatedly takes a best-scoring coalition disjoint from those taken; None: uniformly random.
+    # Coalition indices follow `enumerate_masks` order, which is also the order
+    # `_candidates_from_rmask` lists the candidates in, so drawing from the tied indices consumes
+    # `rng` exactly like the reference functions above.
+    alive = np.ones((engine.masks.shape[0],), dtype=bool)
+    cands = np.arange(engine.masks.shape[0])
+    partition: list[int] = []
+    indices: list[int] = []
+    while cands.shape[0] > 0:
+        if score is None:
+            best = cands
+        else:
+            cand_score = score[cands]
+            best = cands[cand_score == cand_score.max()]
+        chosen = int(rng.choice(best))
+        indices.append(chosen)
+        partition.append(int(engine.masks[chosen]))
+        for i in engine.members[chosen]:
+            if i < 0:
+                break
+            alive[engine.player_coalitions[i]] = False
+        cands = cands[alive[cands]]
+    return GreedyResult(partition=partition, indices=indices)
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from sim_contribution.algorithms import build_greedy_engine
+from sim_contribution.coalitions import Coalitions
+from sim_contribution.counters import CoalitionCounts, UpDownStats, update_updown
+from sim_contribution.instrument import StageTimer
+from sim_contribution.noise import CHUNK_VALUES
+from sim_contribution.oracle import OracleResult, compute_oracle_values
+from sim_contribution.oracle_cache import OracleCache, oracle_key
+from sim_contribution.policies import Policy, PolicyState, resolve_policies
+from sim_contribution.simulate import (
+    EPS_SEED_OFFSET,
+    ModelArtifacts,
+    SimulationConfig,
+    prepare_artifacts,
+)
+
+# Replications of one config advance together: counters, scores and noise are (R, m) arrays and
+# every greedy step is one batched argmax. Replication r consumes its own policy and noise
+# generators exactly as run_simulation(replace(config, seed=seeds[r])) does, so its totals and
+# regrets are bit-identical to that run.
+
+
+@dataclass(frozen=True)
+class ReplicationBatch:
+    config: SimulationConfig
+    seeds: list[int]
+    oracle_values: np.ndarray  # (R,)
+    oracle_upper_bounds: np.ndarray | None  # (R,); only for oracle="approx"
+    totals: dict[str, np.ndarray]  # algorithm -> (R, T)
+    regrets: dict[str, np.ndarray]  # algorithm -> (R, T)
+
+
+def _replication_artifacts(
+    config: SimulationConfig,
+    seeds: list[int],
+    oracle_cache: OracleCache | None,
+    timer: StageTimer,
+) -> list[ModelArtifacts]:
+    if config.oracle != "exact":
+        return [prepare_artifacts(replace(config, seed=s), oracle_cache, timer) for s in seeds]
+
+    # Exact oracles that are not cached are solved in one batched DP.
+    base = [prepare_artifacts(replace(config, seed=s, oracle="none"), timer=timer) for s in seeds]
+    keys = [
+        oracle_key(a.players, a.coalitions.mu, config.oracle) if oracle_cache is not None else ""
+        for a in base
+    ]
+    values = np.full((len(base),), np.nan)
+    missing: list[int] = []
+    for r, key in enumerate(keys):
+        cached = oracle_cache.get(key) if oracle_cache is not None else None
+        if cached is None:
+            missing.append(r)
+        else:
+            values[r] = cached.value
+    if missing:
+        with timer.stage("oracle"):
+            mu = np.stack([base[r].coalitions.mu for r in missing])
+            values[missing] = compute_oracle_values(config.n, replace(base[0].coalitions, mu=mu))
+        if oracle_cache is not None:
+            for r in missing:
+                v = float(values[r])
+                oracle_cache.put(keys[r], OracleResult(value=v, lower_bound=v, upper_bound=v))
+    return [replace(a, oracle_value=float(v)) for a, v in zip(base, values)]
+
+
+def _stacked_coalitions(artifacts: Sequence[ModelArtifacts]) -> Coalitions:
+    # Same structure for every replication (it only depends on n); mu/comp/cost become (R, m).
+    first = artifacts[0].coalitions
+    return replace(
+        first,
+        mu=np.stack([a.coalitions.mu for a in artifacts]),
+        comp=np.stack([a.coalitions.comp for a in artifacts]),
+        cost=np.stack([a.coalitions.cost for a in artifacts]),
+    )
+
+
+def _new_batch_state(coalitions: Coalitions, R: int) -> PolicyState:
+    m = int(coalitions.masks.shape[0])
+    index = coalitions.mask_to_index
+    return PolicyState(
+        t=0,
+        stats=UpDownStats(
+            up=CoalitionCounts(values=np.zeros((R, m), dtype=np.int32), mask_to_index=index),
+            down=CoalitionCounts(values=np.zeros((R, m), dtype=np.int32), mask_to_index=index),
+        ),
+        plays=np.zeros((R, m), dtype=np.int32),
+        outcome_sum=np.zeros((R, m), dtype=float),
+    )
+
+
+def _score_each(
+    policy: Policy,
+    coalitions: Coalitions,
+    state: PolicyState,
+    rngs: Sequence[np.random.Generator],
+) -> np.ndarray | None:
+    # Fallback for policies without batch_score: per-replication views of the batched state.
+    scores: list[np.ndarray | None] = []
+    for r, rng in enumerate(rngs):
+        index = state.stats.up.mask_to_index
+        view = PolicyState(
+            t=state.t,
+            stats=UpDownStats(
+                up=CoalitionCounts(values=state.stats.up.values[r], mask_to_index=index),
+                down=CoalitionCounts(values=state.stats.down.values[r], mask_to_index=index),
+            ),
+            plays=state.plays[r],
+            outcome_sum=state.outcome_sum[r],
+        )
+        rep = replace(
+            coalitions, mu=coalitions.mu[r], comp=coalitions.comp[r], cost=coalitions.cost[r]
+        )
+        scores.append(policy.score(rep, view, rng))
+    proto = next((s for s in scores if s is not None), None)
+    if proto is None:
+        return None
+    # A constant row ties every candidate, which is what a None score means.
+    return np.stack([np.zeros_like(proto) if s is None else s for s in scores])
+
+
+def _greedy_batched(
+    score: np.ndarray | None,
+    rngs: Sequence[np.random.Generator],
+    members: np.ndarray,
+    incidence: np.ndarray,
+) -> np.ndarray:
+    # `greedy_engine_max` for every replication at once; returns (R, n) team indices, -1 padded.
+    # rng.choice over k tied candidates draws exactly like rng.integers(0, k) (nothing for k == 1),
+    # so only replications with a real tie touch their generator.
+    R = len(rngs)
+    n, m = incidence.shape
+    alive = np.ones((R, m), dtype=bool)
+    teams = np.full((R, n), -1, dtype=np.int32)
+    if score is not None:
+        low = -np.inf if score.dtype.kind == "f" else np.iinfo(score.dtype).min
+    for slot in range(n):
+        if score is None:
+            ties = alive
+        else:
+            best = np.where(alive, score, low).max(axis=1, keepdims=True)
+            ties = alive & (score == best)
+        counts = np.count_nonzero(ties, axis=1)
+        active = np.flatnonzero(counts)
+        if active.shape[0] == 0:
+            break
+        chosen = np.argmax(ties, axis=1)
+        tied = np.flatnonzero(counts > 1)
+        if tied.shape[0] > 0:
+            pick = np.array([rngs[r].integers(0, counts[r]) for r in tied.tolist()])
+            # Index of the pick-th tied candidate in coalition order.
+            running = np.cumsum(ties[tied], axis=1, dtype=np.int32)
+            chosen[tied] = np.argmax(running > pick[:, None], axis=1)
+        chosen = chosen[active]
+        teams[active, slot] = chosen
+        mem = members[chosen]
+        taken = incidence[np.where(mem >= 0, mem, mem[:, :1])].any(axis=1)
+        alive[active] &= ~taken
+    return teams
+
+
+def _observe_batched(
+    state: PolicyState,
+    flat_stats: UpDownStats,
+    flat_members: np.ndarray,
+    teams: np.ndarray,
+    mu: np.ndarray,
+    eps_t: np.ndarray,
+    y_individual: np.ndarray,
+) -> None:
+    # `observe` for every replication: (replication, coalition) pairs are flattened so the shared
+    # update_updown applies, with player ids offset by replication in `flat_members`.
+    m = mu.shape[1]
+    rr, slot = np.nonzero(teams >= 0)
+    idx = teams[rr, slot].astype(np.int64)
+    y_team = mu[rr, idx] + eps_t[rr, idx]
+    update_updown(flat_stats, flat_members, rr * m + idx, y_team, y_individual.ravel())
+    state.plays[rr, idx] += 1
+    state.outcome_sum[rr, idx] += y_team
+    state.t += 1
+
+
+def run_replication_batch(
+    config: SimulationConfig,
+    seeds: Iterable[int],
+    oracle_cache: OracleCache | None = None,
+    timer: StageTimer | None = None,
+) -> ReplicationBatch:
+    seed_list = [int(s) for s in seeds]
+    if not seed_list:
+        raise ValueError("seeds must be non-empty")
+    if timer is None:
+        timer = StageTimer()
+
+    artifacts = _replication_artifacts(config, seed_list, oracle_cache, timer)
+    coalitions = _stacked_coalitions(artifacts)
+    R, n, T = len(seed_list), config.n, config.T
+    m = int(coalitions.masks.shape[0])
+    mu = coalitions.mu
+
+    with timer.stage("engine"):
+        engine = build_greedy_engine(artifacts[0].coalitions)
+        # incidence[p, c]: coalition c contains player p.
+        incidence = np.zeros((n, m), dtype=bool)
+        for p, idx in enumerate(engine.player_coalitions):
+            incidence[p, idx] = True
+        offsets = (np.arange(R, dtype=np.int64) * n)[:, None, None]
+        members = coalitions.members
+        flat_members = np.where(members >= 0, members[None] + offsets, -1).reshape(R * m, -1)
+
+    policies = resolve_policies(config.algorithms)
+    rngs = {
+        algo: [np.random.default_rng(s + p.seed_offset) for s in seed_list]
+        for algo, p in policies.items()
+    }
+    noise_rngs = [np.random.default_rng(s + EPS_SEED_OFFSET) for s in seed_list]
+    states = {algo: _new_batch_state(coalitions, R) for algo in policies}
+    flat_stats = {
+        algo: UpDownStats(
+            up=replace(st.stats.up, values=st.stats.up.values.reshape(-1)),
+            down=replace(st.stats.down, values=st.stats.down.values.reshape(-1)),
+        )
+        for algo, st in states.items()
+    }
+    totals = {algo: np.empty((R, T), dtype=float) for algo in policies}
+    rep = np.arange(R)[:, None]
+
+    # Each replication's noise comes in row blocks of its own generator, like iter_noise_rows.
+    chunk_periods = max(1, CHUNK_VALUES // max(R * m, 1))
+    t = 0
+    while t < T:
+        rows = min(chunk_periods, T - t)
+        with timer.stage("noise"):
+            block = np.stack(
+                [
+                    rng.normal(loc=0.0, scale=config.noise_sigma, size=(rows, m))
+                    for rng in noise_rngs
+                ],
+                axis=1,
+            )
+        for eps_t in block:
+            y_individual = mu[:, :n] + eps_t[:, :n]
+            for algo, policy in policies.items():
+                start = time.perf_counter()
+                state = states[algo]
+                if policy.batch_score is not None:
+                    score = policy.batch_score(coalitions, state, rngs[algo])
+                else:
+                    score = _score_each(policy, coalitions, state, rngs[algo])
+                teams = _greedy_batched(score, rngs[algo], members, incidence)
+                _observe_batched(
+                    state, flat_stats[algo], flat_members, teams, mu, eps_t, y_individual
+                )
+                # Left-to-right running sum over the teams, as period_totals does for one run.
+                team_mu = np.where(teams >= 0, mu[rep, np.maximum(teams, 0)], 0.0)
+                totals[algo][:, t] = np.cumsum(team_mu, axis=1)[:, -1]
+                timer.add(f"algorithm:{algo}", time.perf_counter() - start)
+            t += 1
+
+    oracle_values = np.array([a.oracle_value for a in artifacts], dtype=float)
+    upper = (
+        np.array([a.oracle_upper_bound for a in artifacts], dtype=float)
+        if config.oracle == "approx"
+        else None
+    )
+    regrets = {algo: oracle_values[:, None] - tot for algo, tot in totals.items()}
+
+    return ReplicationBatch(
+        config=config,
+        seeds=seed_list,
+        oracle_values=oracle_values,
+        oracle_upper_bounds=upper,
+        totals=totals,
+        regrets=regrets,
+    )
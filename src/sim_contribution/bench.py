@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from sim_contribution.algorithms import build_greedy_engine, greedy_engine_max
+from sim_contribution.coalitions import precompute_coalitions
+from sim_contribution.defaults import (
+    BENCH_STAGES,
+    CLI_IMPORT_BUDGET_SECONDS,
+    DEFAULT_BENCH_THRESHOLD,
+)
+from sim_contribution.model import ModelConfig, generate_players
+from sim_contribution.oracle import compute_oracle_value
+from sim_contribution.policies import new_policy_state, resolve_policies
+from sim_contribution.simulate import (
+    MAX_EXACT_ORACLE_PLAYERS,
+    SimulationConfig,
+    prepare_artifacts,
+    run_simulation,
+)
+
+# `import sim_contribution.cli` must not load any of these; see check_cli_import.
+HEAVY_MODULES = ("numpy", "pandas", "matplotlib", "pyarrow")
+_IMPORT_PROBE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import sim_contribution.cli\n"
+    "print(time.perf_counter() - start)\n"
+    "print(','.join(m for m in sys.argv[1:] if m in sys.modules))\n"
+)
+
+
+@dataclass(frozen=True)
+class BenchResult:
+    stage: str
+    n: int
+    T: int
+    seconds: float  # best of `repeat` runs
+    throughput: float  # `unit` per second
+    unit: str
+    peak_bytes: int  # tracemalloc high-water mark of one extra traced run
+
+
+def _measure(fn: Callable[[], object], repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    # Tracing slows allocation-heavy code, so memory is measured in a separate run.
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, int(peak)
+
+
+def measure_cli_import(repeat: int = 3) -> tuple[float, list[str]]:
+    # Best import time of the CLI module over fresh interpreters, and the heavy modules it loaded.
+    best = float("inf")
+    loaded: list[str] = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE, *HEAVY_MODULES],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.splitlines()
+        best = min(best, float(out[0]))
+        loaded = [m for m in out[1].split(",") if m] if len(out) > 1 else []
+    return best, loaded
+
+
+def check_cli_import(budget: float = CLI_IMPORT_BUDGET_SECONDS, repeat: int = 3) -> list[str]:
+    seconds, loaded = measure_cli_import(repeat)
+    problems: list[str] = []
+    if seconds > budget:
+        problems.append(f"import sim_contribution.cli took {seconds:.4f}s (budget {budget:.4f}s)")
+    if loaded:
+        problems.append(f"import sim_contribution.cli loaded {', '.join(loaded)}")
+    return problems
+
+
+def _bench_point(stage: str, n: int, T: int, seed: int, repeat: int) -> BenchResult | None:
+    if stage == "import":
+        seconds, _ = measure_cli_import(repeat)
+        return BenchResult(stage, n, T, seconds, 1.0 / seconds, "imports/s", 0)
+
+    players = generate_players(ModelConfig(n=n, d=8, seed=seed))
+    coalitions = precompute_coalitions(players)
+    m = int(coalitions.masks.shape[0])
+
+    if stage == "precompute":
+        seconds, peak = _measure(lambda: precompute_coalitions(players), repeat)
+        return BenchResult(stage, n, T, seconds, m / seconds, "coalitions/s", peak)
+
+    if stage == "oracle":
+        if n > MAX_EXACT_ORACLE_PLAYERS:
+            return None
+        seconds, peak = _measure(lambda: compute_oracle_value(n, coalitions), repeat)
+        return BenchResult(stage, n, T, seconds, (1 << n) / seconds, "masks/s", peak)
+
+    if stage == "greedy":
+        engine = build_greedy_engine(coalitions)
+        rng = np.random.default_rng(seed)
+        policy = resolve_policies(["UD"])["UD"]
+        state = new_policy_state(coalitions)
+        state.stats.up.values[:] = rng.integers(0, 50, size=m)
+        state.stats.down.values[:] = rng.integers(0, 50, size=m)
+
+        def partitions() -> None:
+            for _ in range(T):
+                greedy_engine_max(engine, policy.score(coalitions, state, rng), rng)
+
+        seconds, peak = _measure(partitions, repeat)
+        return BenchResult(stage, n, T, seconds, T / seconds, "partitions/s", peak)
+
+    if stage == "run":
+        config = SimulationConfig(n=n, T=T, d=8, seed=seed, oracle="none")
+        artifacts = prepare_artifacts(config)
+        seconds, peak = _measure(lambda: run_simulation(config, artifacts), repeat)
+        periods = T * len(config.algorithms)
+        return BenchResult(stage, n, T, seconds, periods / seconds, "periods/s", peak)
+
+    raise ValueError(f"unknown bench stage: {stage} (choose from {', '.join(BENCH_STAGES)})")
+
+
+def run_bench(
+    ns: Iterable[int],
+    Ts: Iterable[int],
+    stages: Iterable[str] = BENCH_STAGES,
+    repeat: int = 3,
+    seed: int = 0,
+) -> list[BenchResult]:
+    if repeat <= 0:
+        raise ValueError("repeat must be positive")
+    stage_list = list(stages)
+    unknown = set(stage_list) - set(BENCH_STAGES)
+    if unknown:
+        raise ValueError(f"unknown bench stages: {', '.join(sorted(unknown))}")
+
+    results: list[BenchResult] = []
+    T_list = [int(T) for T in Ts]
+    ns_list = [int(n) for n in ns]
+    for n in ns_list:
+        for stage in stage_list:
+            if stage == "import" and n != ns_list[0]:
+                continue
+            # import, precompute and oracle do not depend on T.
+            for T in T_list if stage in ("greedy", "run") else T_list[:1]:
+                res = _bench_point(stage, int(n), T, seed, repeat)
+                if res is not None:
+                    results.append(res)
+    return results
+
+
+def bench_report(results: list[BenchResult]) -> dict[str, object]:
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": [asdict(r) for r in results],
+    }
+
+
+def write_bench(results: list[BenchResult], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(bench_report(results), indent=2) + "\n", encoding="utf-8")
+
+
+def compare_bench(
+    results: list[BenchResult], baseline: Path, threshold: float = DEFAULT_BENCH_THRESHOLD
+) -> list[str]:
+    # Returns one message per point that is more than `threshold` slower than the baseline.
+    base = json.loads(baseline.read_text(encoding="utf-8"))
+    by_key = {(r["stage"], r["n"], r["T"]): r for r in base["results"]}
+    regressions: list[str] = []
+    for r in results:
+        old = by_key.get((r.stage, r.n, r.T))
+        if old is None:
+            continue
+        ratio = r.seconds / float(old["seconds"])
+        if ratio > 1.0 + threshold:
+            regressions.append(
+                f"{r.stage} n={r.n} T={r.T}: {r.seconds:.4f}s vs {float(old['seconds']):.4f}s "
+                f"({ratio:.2f}x)"
+            )
+    return regressions
@@ -1,12 +1,21 @@
 from __future__ import annotations
 
 from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from numpy.typing import DTypeLike
+
+# Player indices that fit in a non-negative int64 mask.
+INT64_MASK_BITS = 63
 
 
 def iter_bits(mask: int) -> Iterable[int]:
     while mask:
         lsb = mask & -mask
-        idx = (lsb.bit_length() - 1)
+        idx = lsb.bit_length() - 1
         yield idx
         mask ^= lsb
 
@@ -24,3 +33,77 @@ def lowest_bit_index(mask: int) -> int:
 def members_list(mask: int) -> list[int]:
     return list(iter_bits(mask))
 
+
+# Array versions of the helpers above. Masks are int64, or Python ints in an object array when
+# players do not fit in INT64_MASK_BITS (the `coalitions.masks_from_members` convention).
+
+
+def popcount_array(masks: np.ndarray) -> np.ndarray:
+    masks = np.asarray(masks)
+    if masks.dtype == object:
+        counts = [int(m).bit_count() for m in masks.ravel()]
+        return np.array(counts, dtype=np.int64).reshape(masks.shape)
+    return np.bitwise_count(masks)
+
+
+def lowest_bit_index_array(masks: np.ndarray) -> np.ndarray:
+    masks = np.asarray(masks)
+    if np.any(masks == 0):
+        raise ValueError("masks must be non-zero")
+    if masks.dtype == object:
+        idx = [lowest_bit_index(int(m)) for m in masks.ravel()]
+        return np.array(idx, dtype=np.int64).reshape(masks.shape)
+    return np.bitwise_count((masks & -masks) - 1).astype(np.int64)
+
+
+def members_array(
+    masks: np.ndarray, width: int | None = None, dtype: DTypeLike = np.int64
+) -> np.ndarray:
+    # (r, width) ascending member indices per mask, padded with -1; width defaults to the largest
+    # popcount. One pass per column strips the lowest set bit of every mask at once. A narrow
+    # signed `dtype` (e.g. int8 for the oracle's n <= 24) keeps large batches cheap to index with.
+    masks = np.asarray(masks).ravel()
+    counts = popcount_array(masks)
+    if width is None:
+        width = int(counts.max()) if masks.shape[0] > 0 else 0
+    if masks.shape[0] > 0 and int(counts.max()) > width:
+        raise ValueError(f"masks have more than {width} members")
+    out = np.full((masks.shape[0], width), -1, dtype=dtype)
+    if masks.dtype == object:
+        for row, mask in enumerate(masks):
+            mem = members_list(int(mask))
+            out[row, : len(mem)] = mem
+        return out
+
+    rest = masks.copy()
+    for col in range(width):
+        live = np.flatnonzero(rest)
+        out[live, col] = lowest_bit_index_array(rest[live])
+        rest[live] &= rest[live] - 1
+    return out
+
+
+def mask_from_members(members: Iterable[int]) -> int:
+    mask = 0
+    for i in members:
+        mask |= 1 << int(i)
+    return mask
+
+
+def mask_words(masks: np.ndarray) -> np.ndarray:
+    # (r, words) little-endian uint64 words of int or Python-int masks, for fixed-width storage.
+    values = [int(m) for m in np.asarray(masks).ravel()]
+    if any(v < 0 for v in values):
+        raise ValueError("masks must be non-negative")
+    words = max(1, -(-max((v.bit_length() for v in values), default=0) // 64))
+    buf = b"".join(v.to_bytes(8 * words, "little") for v in values)
+    return np.frombuffer(buf, dtype="<u8").reshape(len(values), words).copy()
+
+
+def masks_from_words(words: np.ndarray) -> np.ndarray:
+    # Inverse of mask_words: an object array of Python-int masks.
+    words = np.ascontiguousarray(words, dtype="<u8")
+    out = np.empty((words.shape[0],), dtype=object)
+    for row in range(words.shape[0]):
+        out[row] = int.from_bytes(words[row].tobytes(), "little")
+    return out
@@ -1,74 +1,516 @@
 from __future__ import annotations
 
 import argparse
-from datetime import datetime
+from collections.abc import Mapping
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import pandas as pd
-
-from sim_contribution.plotting import (
-    plot_team_mu_hist,
-    plot_team_mu_quantiles,
-    plot_team_mu_time_stats,
-    plot_totals_and_regret,
+from sim_contribution.defaults import (
+    BENCH_STAGES,
+    BUILTIN_POLICIES,
+    CLI_IMPORT_BUDGET_SECONDS,
+    DEFAULT_BENCH_THRESHOLD,
+    DEFAULT_CHECKPOINT_EVERY,
+    DEFAULT_INGEST_CHUNK_ROWS,
+    DEFAULT_ORACLE_CACHE_BYTES,
+    DEFAULT_POLICIES,
+    DEFAULT_REPLICATION_BATCH,
+    DEFAULT_TEAM_MU_BINS,
+    ORACLE_MODES,
+    OUTPUT_FORMATS,
+    parse_policy_names,
 )
-from sim_contribution.simulate import SimulationConfig, run_simulation, save_bundle
+
+# Only argparse and the dependency-free defaults load with this module; numpy, pandas and
+# matplotlib are imported inside the command that needs them, which keeps short jobs fast.
+if TYPE_CHECKING:
+    from sim_contribution.instrument import StageTimer
+    from sim_contribution.oracle_cache import OracleCache
+    from sim_contribution.plotting import Columns
+    from sim_contribution.policies import PolicyState
+    from sim_contribution.simulate import SimulationConfig
+
+
+def _add_model_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--n", type=int, default=12)
+    p.add_argument("--T", type=int, default=200)
+    p.add_argument("--d", type=int, default=8)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--noise-sigma", type=float, default=1.0)
+    p.add_argument(
+        "--oracle",
+        choices=ORACLE_MODES,
+        default="exact",
+        help=(
+            "Oracle for regret: exact 2^n DP (n<=24), approx (local-search lower bound and LP "
+            "upper bound, any n) or none (regret is NaN)."
+        ),
+    )
+    p.add_argument(
+        "--algorithms",
+        type=parse_policy_names,
+        default=DEFAULT_POLICIES,
+        help=(
+            f"Comma-separated algorithms to run (default: {','.join(DEFAULT_POLICIES)}; "
+            f"built-in: {','.join(BUILTIN_POLICIES)})."
+        ),
+    )
+    _add_oracle_cache_args(p)
+
+
+def _add_oracle_cache_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument(
+        "--oracle-cache",
+        type=Path,
+        default=None,
+        help="Directory memoizing oracle results by player parameters (default: off).",
+    )
+    p.add_argument(
+        "--oracle-cache-mb",
+        type=int,
+        default=DEFAULT_ORACLE_CACHE_BYTES >> 20,
+        help="Size limit of --oracle-cache; LRU entries are evicted (default: %(default)s).",
+    )
 
 
 def _build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(prog="sim-contribution")
     sub = p.add_subparsers(dest="cmd", required=True)
 
-    run = sub.add_parser("run", help="Run UD/DU/Random simulation and write outputs.")
-    run.add_argument("--n", type=int, default=12)
-    run.add_argument("--T", type=int, default=200)
-    run.add_argument("--d", type=int, default=8)
-    run.add_argument("--seed", type=int, default=0)
-    run.add_argument("--noise-sigma", type=float, default=1.0)
+    run = sub.add_parser("run", help="Run the team-formation algorithms and write outputs.")
+    _add_model_args(run)
     run.add_argument(
         "--out",
         type=Path,
         default=None,
         help="Output directory (default: outputs/run_<timestamp>).",
     )
+    run.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="csv",
+        help="Table format under data/: csv, npy (memory-mappable) or parquet (needs pyarrow).",
+    )
+    run.add_argument(
+        "--save-eps",
+        action="store_true",
+        help="Also keep the full (T, m) noise matrix and write data/eps.npz (default: seed only).",
+    )
+    run.add_argument(
+        "--stream",
+        action="store_true",
+        help="Append period rows to the csv outputs during the run and checkpoint the state.",
+    )
+    run.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=DEFAULT_CHECKPOINT_EVERY,
+        help="Periods between appends/checkpoints in --stream mode (default: %(default)s).",
+    )
+    run.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the interrupted --stream run in --out from its checkpoint and config.",
+    )
+    run.add_argument(
+        "--oracle-workers",
+        type=int,
+        default=1,
+        help="Processes sharing the exact oracle DP through shared memory (default: %(default)s).",
+    )
+    run.add_argument(
+        "--team-mu-hist",
+        type=int,
+        nargs="?",
+        const=DEFAULT_TEAM_MU_BINS,
+        default=None,
+        metavar="BINS",
+        help=(
+            "Write team_mu histograms and per-coalition counts instead of one sample row per "
+            f"team (default bins: {DEFAULT_TEAM_MU_BINS})."
+        ),
+    )
+    run.add_argument(
+        "--team-mu-window",
+        type=int,
+        default=None,
+        help="Periods per --team-mu-hist window (default: one window over the whole run).",
+    )
+    run.add_argument(
+        "--warm-start",
+        type=Path,
+        default=None,
+        metavar="LOG",
+        help="Seed every algorithm's counters from an observation log (.csv or .parquet).",
+    )
+    run.add_argument(
+        "--warm-start-chunk-rows",
+        type=int,
+        default=DEFAULT_INGEST_CHUNK_ROWS,
+        help="Log rows read per chunk for --warm-start (default: %(default)s).",
+    )
+    run.add_argument(
+        "--no-plots",
+        action="store_true",
+        help="Skip the PNGs (render them later with the plot subcommand).",
+    )
+    run.add_argument(
+        "--profile",
+        action="store_true",
+        help="Run under cProfile; writes profile.pstats and profile.txt next to the outputs.",
+    )
+
+    plot = sub.add_parser("plot", help="Render the plots of a saved run directory.")
+    plot.add_argument("run_dir", type=Path, help="Output directory of an earlier run.")
+    plot.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=DEFAULT_INGEST_CHUNK_ROWS,
+        help="team_mu_samples rows read at a time when binning them for the histogram.",
+    )
+
+    batch = sub.add_parser(
+        "batch",
+        help="Run many seeds of the same configuration and write mean/CI time series.",
+    )
+    _add_model_args(batch)
+    batch.add_argument(
+        "--replications",
+        type=int,
+        default=100,
+        help="Number of seeds to run: seed, seed+1, ..., seed+replications-1.",
+    )
+    batch.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1).")
+    batch.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_REPLICATION_BATCH,
+        help=(
+            "Replications advanced together in one vectorized pass; 1 runs them one at a time "
+            "(default: %(default)s)."
+        ),
+    )
+    batch.add_argument(
+        "--out",
+        type=Path,
+        default=None,
+        help="Output directory (default: outputs/batch_<timestamp>).",
+    )
+
+    sweep = sub.add_parser(
+        "sweep",
+        help="Run a parameter grid, reusing cached points, and write one results table.",
+    )
+    sweep.add_argument(
+        "--grid",
+        type=Path,
+        required=True,
+        help='JSON grid spec, e.g. {"n": [8, 12], "T": 200, "d": 8, "seed": [0, 1]}.',
+    )
+    sweep.add_argument(
+        "--cache",
+        type=Path,
+        default=Path("outputs") / "sweep_cache",
+        help="Per-point result cache; cached points are skipped (default: outputs/sweep_cache).",
+    )
+    sweep.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1).")
+    _add_oracle_cache_args(sweep)
+    sweep.add_argument(
+        "--out",
+        type=Path,
+        default=None,
+        help="Output directory (default: outputs/sweep_<timestamp>).",
+    )
+
+    bench = sub.add_parser(
+        "bench",
+        help="Time precompute/oracle/greedy/run over an n/T grid and write JSON.",
+    )
+    bench.add_argument("--n", type=int, nargs="+", default=[8, 12, 16])
+    bench.add_argument("--T", type=int, nargs="+", default=[200])
+    bench.add_argument(
+        "--stages",
+        type=lambda v: [s for s in v.split(",") if s],
+        default=list(BENCH_STAGES),
+        help=f"Comma-separated stages (default: {','.join(BENCH_STAGES)}).",
+    )
+    bench.add_argument("--repeat", type=int, default=3, help="Timed runs per point; best is kept.")
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument(
+        "--out",
+        type=Path,
+        default=None,
+        help="JSON report path (default: outputs/bench_<timestamp>.json).",
+    )
+    bench.add_argument(
+        "--baseline",
+        type=Path,
+        default=None,
+        help="Earlier report to compare against; exits with status 1 on regressions.",
+    )
+    bench.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_BENCH_THRESHOLD,
+        help="Allowed slowdown vs --baseline as a fraction (default: %(default)s).",
+    )
+    bench.add_argument(
+        "--import-budget",
+        type=float,
+        default=CLI_IMPORT_BUDGET_SECONDS,
+        help=(
+            "With the import stage: fail when importing the CLI takes longer (seconds) or loads "
+            "numpy/pandas/matplotlib (default: %(default)s)."
+        ),
+    )
     return p
 
 
+def _config_from_args(args: argparse.Namespace) -> SimulationConfig:
+    from sim_contribution.simulate import SimulationConfig
+
+    return SimulationConfig(
+        n=int(args.n),
+        T=int(args.T),
+        d=int(args.d),
+        seed=int(args.seed),
+        noise_sigma=float(args.noise_sigma),
+        oracle=str(args.oracle),
+        algorithms=tuple(args.algorithms),
+    )
+
+
+def _run_config_from_args(args: argparse.Namespace) -> SimulationConfig:
+    from dataclasses import replace
+
+    return replace(
+        _config_from_args(args),
+        team_mu_bins=args.team_mu_hist,
+        team_mu_window=args.team_mu_window,
+    )
+
+
+def _oracle_cache_from_args(args: argparse.Namespace) -> OracleCache | None:
+    if args.oracle_cache is None:
+        return None
+    from sim_contribution.oracle_cache import OracleCache
+
+    return OracleCache(cache_dir=args.oracle_cache, max_bytes=int(args.oracle_cache_mb) << 20)
+
+
+def _default_out_dir(prefix: str) -> Path:
+    from datetime import datetime
+
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return Path("outputs") / f"{prefix}_{ts}"
+
+
+def _warm_start_from_args(
+    args: argparse.Namespace, config: SimulationConfig, timer: StageTimer
+) -> PolicyState | None:
+    if args.warm_start is None:
+        return None
+    from sim_contribution.coalitions import precompute_coalitions
+    from sim_contribution.ingest import ingest_log
+    from sim_contribution.model import ModelConfig, generate_players
+
+    with timer.stage("warm_start"):
+        players = generate_players(
+            ModelConfig(n=config.n, d=config.d, seed=config.seed, noise_sigma=config.noise_sigma)
+        )
+        return ingest_log(
+            args.warm_start, precompute_coalitions(players), int(args.warm_start_chunk_rows)
+        )
+
+
+def _run(args: argparse.Namespace, out_dir: Path) -> None:
+    from sim_contribution.instrument import StageTimer, write_timings
+    from sim_contribution.plotting import render_plots
+    from sim_contribution.simulate import load_bundle, run_simulation, save_bundle
+    from sim_contribution.stream import load_stream_config, stream_simulation
+
+    timer = StageTimer()
+    timeseries: Mapping[str, Columns]
+    samples: Mapping[str, Columns]
+    hists: Mapping[str, Columns]
+
+    if args.stream or args.resume:
+        if args.format != "csv" or args.save_eps:
+            raise SystemExit("--stream writes csv only and does not keep eps")
+        config = load_stream_config(out_dir) if args.resume else _run_config_from_args(args)
+        initial_state = None if args.resume else _warm_start_from_args(args, config, timer)
+        periods = stream_simulation(
+            config,
+            out_dir,
+            checkpoint_every=int(args.checkpoint_every),
+            resume=bool(args.resume),
+            oracle_cache=_oracle_cache_from_args(args),
+            oracle_workers=int(args.oracle_workers),
+            initial_state=initial_state,
+            timer=timer,
+        )
+        for _ in periods:
+            pass
+        loaded = load_bundle(out_dir)
+        timeseries = dict(loaded.timeseries)
+        samples = dict(loaded.team_mu_samples)
+        hists = dict(loaded.team_mu_hist)
+    else:
+        config = _run_config_from_args(args)
+        initial_state = _warm_start_from_args(args, config, timer)
+        bundle = run_simulation(
+            config,
+            keep_eps=bool(args.save_eps),
+            oracle_cache=_oracle_cache_from_args(args),
+            timer=timer,
+            oracle_workers=int(args.oracle_workers),
+            initial_state=initial_state,
+        )
+        save_bundle(bundle, out_dir, fmt=str(args.format))
+
+        timeseries = {algo: res.summary for algo, res in bundle.results.items()}
+        samples = {
+            algo: res.team_mu_samples
+            for algo, res in bundle.results.items()
+            if res.team_mu_samples is not None
+        }
+        hists = {
+            algo: res.team_mu_hist
+            for algo, res in bundle.results.items()
+            if res.team_mu_hist is not None
+        }
+
+    if not args.no_plots:
+        render_plots(timeseries, samples, out_dir / "plots", timer, team_mu_hist=hists)
+    write_timings(timer, out_dir / "timings.json")
+
+
 def main(argv: list[str] | None = None) -> None:
     args = _build_parser().parse_args(argv)
 
     if args.cmd == "run":
-        out_dir: Path
-        if args.out is None:
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-            out_dir = Path("outputs") / f"run_{ts}"
+        if args.resume and args.out is None:
+            raise SystemExit("--resume needs --out pointing at the interrupted run")
+        out_dir: Path = args.out if args.out is not None else _default_out_dir("run")
+        if not args.profile:
+            _run(args, out_dir)
         else:
-            out_dir = args.out
-
-        config = SimulationConfig(
-            n=int(args.n),
-            T=int(args.T),
-            d=int(args.d),
-            seed=int(args.seed),
-            noise_sigma=float(args.noise_sigma),
+            import cProfile
+            import pstats
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                _run(args, out_dir)
+            finally:
+                profiler.disable()
+            # Only after a successful run, which created out_dir; a failure keeps its own error.
+            profiler.dump_stats(out_dir / "profile.pstats")
+            with (out_dir / "profile.txt").open("w", encoding="utf-8") as f:
+                pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(40)
+        print(f"Wrote outputs to: {out_dir}")
+        return
+
+    if args.cmd == "plot":
+        from sim_contribution.plotting import render_plots, stream_team_mu_histograms
+        from sim_contribution.simulate import load_bundle
+        from sim_contribution.storage import table_path
+
+        run_dir: Path = args.run_dir
+        loaded = load_bundle(run_dir, read_samples=False)
+        hists: Mapping[str, Columns] = loaded.team_mu_hist
+        if not hists:
+            # Bin the samples chunk by chunk into the tables `run --team-mu-hist` would write, so
+            # plotting never holds every sample row.
+            fmt = str(loaded.config.get("output_format", "csv"))
+            stems = {a: run_dir / "data" / f"team_mu_samples_{a}" for a in loaded.timeseries}
+            paths = {a: table_path(s, fmt) for a, s in stems.items()}
+            edges, counts = stream_team_mu_histograms(
+                {a: p for a, p in paths.items() if p.exists()}, chunk_rows=int(args.chunk_rows)
+            )
+            hists = {
+                a: {"bin_lo": edges[:-1], "bin_hi": edges[1:], "count": c}
+                for a, c in counts.items()
+            }
+        render_plots(loaded.timeseries, {}, run_dir / "plots", team_mu_hist=hists)
+        print(f"Wrote plots to: {run_dir / 'plots'}")
+        return
+
+    if args.cmd == "batch":
+        import json
+        from dataclasses import asdict
+
+        from sim_contribution.replicate import run_replications
+
+        out_dir = args.out if args.out is not None else _default_out_dir("batch")
+        config = _config_from_args(args)
+        seeds = range(config.seed, config.seed + int(args.replications))
+        summary = run_replications(
+            config,
+            seeds,
+            workers=int(args.workers),
+            oracle_cache=_oracle_cache_from_args(args),
+            batch_size=int(args.batch_size),
         )
-        bundle = run_simulation(config)
-        save_bundle(bundle, out_dir)
 
-        timeseries: dict[str, pd.DataFrame] = {
-            algo: res.summary for algo, res in bundle.results.items()
-        }
-        samples: dict[str, pd.DataFrame] = {
-            algo: res.team_mu_samples for algo, res in bundle.results.items()
-        }
+        (out_dir / "data").mkdir(parents=True, exist_ok=True)
+        meta = {**asdict(config), "seeds": summary.seeds}
+        (out_dir / "config.json").write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+        summary.summary.to_csv(out_dir / "data" / "replications.csv", index=False)
+
+        print(f"Wrote outputs to: {out_dir}")
+        return
+
+    if args.cmd == "sweep":
+        import json
 
-        plot_totals_and_regret(timeseries, out_dir / "plots" / "totals_regret.png")
-        plot_team_mu_hist(samples, out_dir / "plots" / "team_mu_hist.png")
-        plot_team_mu_time_stats(timeseries, out_dir / "plots" / "team_mu_min_median_max.png")
-        plot_team_mu_quantiles(timeseries, out_dir / "plots" / "team_mu_quantiles.png")
+        from sim_contribution.sweep import expand_grid, run_sweep
+
+        out_dir = args.out if args.out is not None else _default_out_dir("sweep")
+        spec = json.loads(args.grid.read_text(encoding="utf-8"))
+        result = run_sweep(
+            expand_grid(spec),
+            args.cache,
+            workers=int(args.workers),
+            oracle_cache=_oracle_cache_from_args(args),
+        )
 
+        out_dir.mkdir(parents=True, exist_ok=True)
+        (out_dir / "grid.json").write_text(json.dumps(spec, indent=2) + "\n", encoding="utf-8")
+        result.table.to_csv(out_dir / "sweep_results.csv", index=False)
+
+        cached = len(result.points) - result.computed
+        print(f"{len(result.points)} points ({result.computed} computed, {cached} cached)")
         print(f"Wrote outputs to: {out_dir}")
         return
 
+    if args.cmd == "bench":
+        from sim_contribution.bench import check_cli_import, compare_bench, run_bench, write_bench
+
+        out_path: Path = (
+            args.out if args.out is not None else _default_out_dir("bench").with_suffix(".json")
+        )
+        results = run_bench(
+            args.n, args.T, stages=args.stages, repeat=int(args.repeat), seed=int(args.seed)
+        )
+        write_bench(results, out_path)
+        for r in results:
+            print(
+                f"{r.stage:<10} n={r.n:<4} T={r.T:<6} {r.seconds:10.4f}s "
+                f"{r.throughput:14.1f} {r.unit:<13} peak={r.peak_bytes / 2**20:.1f}MiB"
+            )
+        print(f"Wrote report to: {out_path}")
+
+        regressions: list[str] = []
+        if "import" in args.stages:
+            regressions += check_cli_import(float(args.import_budget), repeat=int(args.repeat))
+        if args.baseline is not None:
+            regressions += compare_bench(results, args.baseline, threshold=float(args.threshold))
+        for msg in regressions:
+            print(f"REGRESSION {msg}")
+        if regressions:
+            raise SystemExit(1)
+        return
+
     raise SystemExit(2)
 
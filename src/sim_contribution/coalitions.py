@@ -1,74 +1,222 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
 from dataclasses import dataclass
-from itertools import combinations
 
 import numpy as np
 
-from sim_contribution.bitmask import iter_bits, popcount
+from sim_contribution.bitmask import INT64_MASK_BITS, members_list
 from sim_contribution.model import PlayerParams
 
 
+def _comb2(x: np.ndarray | int) -> np.ndarray | int:
+    return x * (x - 1) // 2
+
+
+def _comb3(x: np.ndarray | int) -> np.ndarray | int:
+    return x * (x - 1) * (x - 2) // 6
+
+
+def coalition_count(n: int, max_size: int = 3) -> int:
+    return n + (int(_comb2(n)) if max_size >= 2 else 0) + (int(_comb3(n)) if max_size >= 3 else 0)
+
+
+def coalition_rank(members: np.ndarray, n: int) -> np.ndarray:
+    # Closed-form index of sorted member rows (padded with -1) in `enumerate_members` order:
+    # singletons, then pairs, then triples, each block in lexicographic order. Within a block of
+    # k-subsets, lex rank = C(n,k) - 1 - sum_r C(n-1-c_r, k-r).
+    members = np.asarray(members, dtype=np.int64)
+    if members.ndim == 1:
+        members = members[None, :]
+    i = members[:, 0]
+    size = np.count_nonzero(members >= 0, axis=1)
+    n_pairs = int(_comb2(n))
+    n_triples = int(_comb3(n))
+
+    rank = i.copy()
+    if members.shape[1] >= 2:
+        j = members[:, 1]
+        pair_rank = n + n_pairs - 1 - _comb2(n - 1 - i) - (n - 1 - j)
+        rank = np.where(size == 2, pair_rank, rank)
+    if members.shape[1] >= 3:
+        j = members[:, 1]
+        k = members[:, 2]
+        triple_rank = (
+            n + n_pairs + n_triples - 1 - _comb3(n - 1 - i) - _comb2(n - 1 - j) - (n - 1 - k)
+        )
+        rank = np.where(size == 3, triple_rank, rank)
+    return rank
+
+
+def _combinadic_decode(x: np.ndarray, k: int, n: int) -> np.ndarray:
+    # Inverse of x = sum_r C(a_r, k-r) with a_0 > a_1 > ... >= 0: greedily take the largest a_r.
+    out = np.empty((x.shape[0], k), dtype=np.int64)
+    rest = x.copy()
+    a = np.arange(n, dtype=np.int64)
+    tables = {1: a, 2: _comb2(a), 3: _comb3(a)}  # tables[kk][a] == C(a, kk)
+    for col, kk in enumerate(range(k, 0, -1)):
+        table = tables[kk]
+        out[:, col] = np.searchsorted(table, rest, side="right") - 1
+        rest = rest - table[out[:, col]]
+    return out
+
+
+def coalition_unrank(index: np.ndarray | int, n: int) -> np.ndarray:
+    # Inverse of `coalition_rank`: coalition indices -> (r, 3) sorted member rows padded with -1.
+    index = np.atleast_1d(np.asarray(index, dtype=np.int64))
+    m = coalition_count(n)
+    if np.any((index < 0) | (index >= m)):
+        raise ValueError(f"coalition index out of range for n={n}")
+    n_pairs = int(_comb2(n))
+    n_triples = int(_comb3(n))
+    out = np.full((index.shape[0], 3), -1, dtype=np.int64)
+
+    single = index < n
+    out[single, 0] = index[single]
+
+    pair = (index >= n) & (index < n + n_pairs)
+    if np.any(pair):
+        x = n_pairs - 1 - (index[pair] - n)
+        out[pair, :2] = n - 1 - _combinadic_decode(x, 2, n)
+
+    triple = index >= n + n_pairs
+    if np.any(triple):
+        x = n_triples - 1 - (index[triple] - n - n_pairs)
+        out[triple, :] = n - 1 - _combinadic_decode(x, 3, n)
+
+    return out
+
+
+def rank_members(members: Sequence[int], n: int) -> int:
+    mem = sorted(int(x) for x in members)
+    if not 1 <= len(mem) <= 3 or mem[0] < 0 or mem[-1] >= n or len(set(mem)) != len(mem):
+        raise ValueError(f"not a coalition of {n} players: {members}")
+    row = np.full((1, 3), -1, dtype=np.int64)
+    row[0, : len(mem)] = mem
+    return int(coalition_rank(row, n)[0])
+
+
+def unrank_members(index: int, n: int) -> tuple[int, ...]:
+    row = coalition_unrank(index, n)[0]
+    return tuple(int(x) for x in row if x >= 0)
+
+
+@dataclass(frozen=True)
+class CoalitionIndex:
+    # Mask -> coalition index without a dict: the mask's members are ranked in closed form.
+    n: int
+
+    def __getitem__(self, mask: int) -> int:
+        mem = members_list(int(mask))
+        if not 1 <= len(mem) <= 3 or mem[-1] >= self.n:
+            raise KeyError(mask)
+        row = np.full((1, 3), -1, dtype=np.int64)
+        row[0, : len(mem)] = mem
+        return int(coalition_rank(row, self.n)[0])
+
+    def __contains__(self, mask: object) -> bool:
+        if not isinstance(mask, (int, np.integer)) or mask <= 0:
+            return False
+        mem = members_list(int(mask))
+        return len(mem) <= 3 and mem[-1] < self.n
+
+    def __len__(self) -> int:
+        return coalition_count(self.n)
+
+
 @dataclass(frozen=True)
 class Coalitions:
-    masks: np.ndarray  # (m,) int64
+    masks: np.ndarray  # (m,) int64; object (Python int) when n > 63
     sizes: np.ndarray  # (m,) int8
-    members: list[list[int]]  # len m
+    members: np.ndarray  # (m, 3) int64, sorted member indices padded with -1
     mu: np.ndarray  # (m,) float
     comp: np.ndarray  # (m,) float
     cost: np.ndarray  # (m,) float
-    mask_to_index: dict[int, int]
+    mask_to_index: CoalitionIndex
 
 
-def enumerate_masks(n: int, max_size: int = 3) -> np.ndarray:
-    masks: list[int] = []
-    for i in range(n):
-        masks.append(1 << i)
+def enumerate_members(n: int, max_size: int = 3) -> np.ndarray:
+    blocks: list[np.ndarray] = []
+
+    singles = np.full((n, 3), -1, dtype=np.int64)
+    singles[:, 0] = np.arange(n)
+    blocks.append(singles)
+
     if max_size >= 2:
-        for i in range(n):
-            for j in range(i + 1, n):
-                masks.append((1 << i) | (1 << j))
+        i, j = np.triu_indices(n, k=1)
+        pairs = np.full((i.shape[0], 3), -1, dtype=np.int64)
+        pairs[:, 0] = i
+        pairs[:, 1] = j
+        blocks.append(pairs)
+
     if max_size >= 3:
-        for i in range(n):
-            for j in range(i + 1, n):
-                for k in range(j + 1, n):
-                    masks.append((1 << i) | (1 << j) | (1 << k))
-    return np.array(masks, dtype=np.int64)
+        # For each first member i, the (j, k) tails are the lex-ordered pairs of {i+1, ..., n-1}.
+        for i in range(n - 2):
+            jj, kk = np.triu_indices(n - i - 1, k=1)
+            triples = np.empty((jj.shape[0], 3), dtype=np.int64)
+            triples[:, 0] = i
+            triples[:, 1] = jj + i + 1
+            triples[:, 2] = kk + i + 1
+            blocks.append(triples)
+
+    return np.concatenate(blocks, axis=0)
+
+
+def masks_from_members(members: np.ndarray) -> np.ndarray:
+    # int64 masks while every member fits below the sign bit; beyond that the masks are Python ints
+    # in an object array (coalitions are identified by index/members, masks are only labels).
+    if members.shape[0] == 0 or int(members.max()) < INT64_MASK_BITS:
+        bits = np.where(members >= 0, np.left_shift(np.int64(1), np.maximum(members, 0)), 0)
+        return np.bitwise_or.reduce(bits, axis=1).astype(np.int64)
+    bits = np.left_shift(
+        np.ones(members.shape, dtype=object), np.maximum(members, 0).astype(object)
+    )
+    bits[members < 0] = 0
+    return np.bitwise_or.reduce(bits, axis=1)
+
+
+def enumerate_masks(n: int, max_size: int = 3) -> np.ndarray:
+    return masks_from_members(enumerate_members(n, max_size=max_size))
 
 
 def precompute_coalitions(players: PlayerParams) -> Coalitions:
     n = int(players.a.shape[0])
-    masks = enumerate_masks(n, max_size=3)
-    sizes = np.array([popcount(int(m)) for m in masks], dtype=np.int8)
-    members = [list(iter_bits(int(m))) for m in masks]
+    members = enumerate_members(n, max_size=3)
+    masks = masks_from_members(members)
+    sizes = np.count_nonzero(members >= 0, axis=1).astype(np.int8)
 
     cos = (players.skills @ players.skills.T).astype(float)
     comp_pair = 1.0 - cos
     cost_pair = np.maximum(0.0, 1.0 - (players.c[:, None] + players.c[None, :]) / 2.0)
 
-    mu = np.zeros((len(masks),), dtype=float)
-    comp = np.zeros((len(masks),), dtype=float)
-    cost = np.zeros((len(masks),), dtype=float)
-
-    for idx, mem in enumerate(members):
-        k = len(mem)
-        if k == 1:
-            i = mem[0]
-            mu[idx] = float(players.a[i])
-            continue
-
-        pairs = list(combinations(mem, 2))
-        pair_count = len(pairs)
-        sum_a = float(players.a[mem].sum())
-        sum_b = float(sum(players.b[i, j] for i, j in pairs))
-        sum_comp = float(sum(comp_pair[i, j] for i, j in pairs))
-        sum_cost = float(sum(cost_pair[i, j] for i, j in pairs))
-
-        comp[idx] = sum_comp / pair_count
-        cost[idx] = sum_cost
-        mu[idx] = sum_a + sum_b + comp[idx] - cost[idx]
-
-    mask_to_index = {int(m): int(i) for i, m in enumerate(masks)}
+    m = members.shape[0]
+    mu = np.zeros((m,), dtype=float)
+    comp = np.zeros((m,), dtype=float)
+    cost = np.zeros((m,), dtype=float)
+
+    single = sizes == 1
+    mu[single] = players.a[members[single, 0]]
+
+    # Sums are accumulated pair by pair in combinations() order, (i,j), (i,k), (j,k), so the
+    # results are bit-identical to summing over `combinations(members, 2)`.
+    for k, pair_cols in ((2, ((0, 1),)), (3, ((0, 1), (0, 2), (1, 2)))):
+        rows = np.flatnonzero(sizes == k)
+        mem = members[rows]
+        sum_a = players.a[mem[:, 0]]
+        for col in range(1, k):
+            sum_a = sum_a + players.a[mem[:, col]]
+        sum_b = np.zeros((rows.shape[0],), dtype=float)
+        sum_comp = np.zeros((rows.shape[0],), dtype=float)
+        sum_cost = np.zeros((rows.shape[0],), dtype=float)
+        for p, q in pair_cols:
+            sum_b = sum_b + players.b[mem[:, p], mem[:, q]]
+            sum_comp = sum_comp + comp_pair[mem[:, p], mem[:, q]]
+            sum_cost = sum_cost + cost_pair[mem[:, p], mem[:, q]]
+
+        comp[rows] = sum_comp / len(pair_cols)
+        cost[rows] = sum_cost
+        mu[rows] = sum_a + sum_b + comp[rows] - cost[rows]
+
     return Coalitions(
         masks=masks,
         sizes=sizes,
@@ -76,6 +224,5 @@ def precompute_coalitions(players: PlayerParams) -> Coalitions:
         mu=mu,
         comp=comp,
         cost=cost,
-        mask_to_index=mask_to_index,
+        mask_to_index=CoalitionIndex(n=n),
     )
-
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from sim_contribution.coalitions import CoalitionIndex, Coalitions
+
+
+@dataclass(frozen=True)
+class CoalitionCounts:
+    values: np.ndarray  # (m,) int32, indexed by coalition index
+    mask_to_index: CoalitionIndex
+
+    def __getitem__(self, mask: int) -> int:
+        return int(self.values[self.mask_to_index[int(mask)]])
+
+
+@dataclass(frozen=True)
+class UpDownStats:
+    up: CoalitionCounts
+    down: CoalitionCounts
+
+
+def new_updown_stats(coalitions: Coalitions) -> UpDownStats:
+    m = int(coalitions.masks.shape[0])
+    return UpDownStats(
+        up=CoalitionCounts(
+            values=np.zeros((m,), dtype=np.int32), mask_to_index=coalitions.mask_to_index
+        ),
+        down=CoalitionCounts(
+            values=np.zeros((m,), dtype=np.int32), mask_to_index=coalitions.mask_to_index
+        ),
+    )
+
+
+def update_updown(
+    stats: UpDownStats,
+    members: np.ndarray,
+    team_idx: np.ndarray,
+    y_team: np.ndarray,
+    y_individual: np.ndarray,
+) -> None:
+    # One observed period: each member of a multi-player team counts an "up" when the team beat
+    # the member's solo outcome and a "down" when it lost. Teams of a partition are disjoint, so
+    # the fancy-indexed adds never collide.
+    mem = members[team_idx]  # (k, 3), padded with -1
+    multi = mem[:, 1] >= 0
+    if not np.any(multi):
+        return
+    team_idx = team_idx[multi]
+    mem = mem[multi]
+    y_team = y_team[multi][:, None]
+    y_mem = y_individual[np.maximum(mem, 0)]
+    valid = mem >= 0
+    stats.up.values[team_idx] += np.count_nonzero(valid & (y_team > y_mem), axis=1).astype(np.int32)
+    stats.down.values[team_idx] += np.count_nonzero(valid & (y_mem > y_team), axis=1).astype(
+        np.int32
+    )
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+# Option values shared by the CLI and the library. This module must stay free of third-party
+# imports: the CLI builds its parser from it before any numpy/pandas code is loaded.
+
+ORACLE_MODES = ("exact", "approx", "none")
+OUTPUT_FORMATS = ("csv", "npy", "parquet")
+DEFAULT_POLICIES = ("UD", "DU", "Random")
+# Names and order of the policies registered in `policies` (tests/test_policies.py checks it).
+BUILTIN_POLICIES = ("UD", "DU", "Random", "UCB", "Thompson", "EpsGreedy")
+BENCH_STAGES = ("import", "precompute", "oracle", "greedy", "run")
+DEFAULT_BENCH_THRESHOLD = 0.2
+# Seconds `import sim_contribution.cli` may take in a fresh interpreter (bench import stage).
+CLI_IMPORT_BUDGET_SECONDS = 0.1
+DEFAULT_CHECKPOINT_EVERY = 1000
+# Replications advanced together by the batched engine (see batched.run_replication_batch).
+DEFAULT_REPLICATION_BATCH = 256
+DEFAULT_ORACLE_CACHE_BYTES = 256 << 20
+# Rows read per chunk when streaming a table: the warm-start log (see ingest.ingest_log) and the
+# team_mu samples binned by `plot`.
+DEFAULT_INGEST_CHUNK_ROWS = 1 << 20
+# Bins of the team_mu histograms written by `run --team-mu-hist`.
+DEFAULT_TEAM_MU_BINS = 30
+
+
+def parse_policy_names(value: str | Iterable[str]) -> tuple[str, ...]:
+    if isinstance(value, str):
+        value = value.split(",")
+    return tuple(s.strip() for s in value if s.strip())
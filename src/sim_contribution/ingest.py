@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+
+from sim_contribution.coalitions import Coalitions, coalition_rank
+from sim_contribution.defaults import DEFAULT_INGEST_CHUNK_ROWS
+from sim_contribution.policies import PolicyState, new_policy_state
+from sim_contribution.storage import iter_table_chunks
+
+# An observation log has one row per fielded team: the period `t`, up to three member ids
+# (missing members empty or -1), the team outcome and each member's individual outcome in that
+# period. This is what `observe` sees, so ingesting a log replays its up/down bookkeeping.
+LOG_MEMBER_COLUMNS = ("member_0", "member_1", "member_2")
+LOG_MEMBER_OUTCOME_COLUMNS = ("y_member_0", "y_member_1", "y_member_2")
+LOG_COLUMNS = ("t", *LOG_MEMBER_COLUMNS, "y_team", *LOG_MEMBER_OUTCOME_COLUMNS)
+
+
+def _log_members(chunk: Mapping[str, np.ndarray], n: int) -> tuple[np.ndarray, np.ndarray]:
+    # (rows, 3) member ids sorted ascending and padded with -1, plus the matching outcomes.
+    raw = np.column_stack([np.asarray(chunk[c], dtype=float) for c in LOG_MEMBER_COLUMNS])
+    y = np.column_stack([np.asarray(chunk[c], dtype=float) for c in LOG_MEMBER_OUTCOME_COLUMNS])
+    missing = np.isnan(raw) | (raw < 0)
+    if np.any(~missing & ((raw >= n) | (raw != np.floor(raw)))):
+        raise ValueError(f"log member ids must be integers in [0, {n})")
+    # Missing members sort last.
+    keys = np.where(missing, n, raw).astype(np.int64)
+    order = np.argsort(keys, axis=1, kind="stable")
+    members = np.take_along_axis(keys, order, axis=1)
+    y = np.take_along_axis(y, order, axis=1)
+    if np.any(members[:, 0] == n):
+        raise ValueError("every log row needs at least one member")
+    if np.any(np.isnan(y) & (members < n)):
+        raise ValueError("log rows need an outcome for every member")
+    if np.any((members[:, 1:] == members[:, :-1]) & (members[:, 1:] < n)):
+        raise ValueError("log rows must not repeat a member")
+    members[members == n] = -1
+    return members, y
+
+
+def ingest_chunk(
+    state: PolicyState, coalitions: Coalitions, chunk: Mapping[str, np.ndarray]
+) -> None:
+    # Adds one chunk of log rows to `state` with bincount group-bys over the coalition index;
+    # up/down follow update_updown and plays/outcome_sum follow observe. state.t is left alone.
+    n = coalitions.mask_to_index.n
+    m = int(coalitions.masks.shape[0])
+    members, y_mem = _log_members(chunk, n)
+    team_idx = coalition_rank(members, n)
+    y_team = np.asarray(chunk["y_team"], dtype=float)
+    if np.any(np.isnan(y_team)):
+        raise ValueError("log rows need a team outcome (y_team)")
+
+    state.plays += np.bincount(team_idx, minlength=m).astype(np.int32)
+    state.outcome_sum += np.bincount(team_idx, weights=y_team, minlength=m)
+
+    multi = members[:, 1] >= 0
+    valid = members[multi] >= 0
+    y_team = y_team[multi][:, None]
+    y_mem = y_mem[multi]
+    up = np.count_nonzero(valid & (y_team > y_mem), axis=1)
+    down = np.count_nonzero(valid & (y_mem > y_team), axis=1)
+    state.stats.up.values[:] += np.bincount(team_idx[multi], weights=up, minlength=m).astype(
+        np.int32
+    )
+    state.stats.down.values[:] += np.bincount(team_idx[multi], weights=down, minlength=m).astype(
+        np.int32
+    )
+
+
+def ingest_log(
+    path: Path, coalitions: Coalitions, chunk_rows: int = DEFAULT_INGEST_CHUNK_ROWS
+) -> PolicyState:
+    # Policy state after every period of the log at `path` (csv or parquet), read `chunk_rows`
+    # rows at a time. Row order is free. Every period fields at least one team, so the period ids
+    # are consecutive and only their running min and max are kept across chunks.
+    state = new_policy_state(coalitions)
+    first, last = None, None
+    for chunk in iter_table_chunks(path, chunk_rows, LOG_COLUMNS):
+        ingest_chunk(state, coalitions, chunk)
+        t = np.asarray(chunk["t"], dtype=float)
+        if t.shape[0] == 0:
+            continue
+        if np.any(np.isnan(t) | (t != np.floor(t))):
+            raise ValueError("log periods t must be integers")
+        lo, hi = int(t.min()), int(t.max())
+        first = lo if first is None else min(first, lo)
+        last = hi if last is None else max(last, hi)
+    state.t = 0 if first is None or last is None else last - first + 1
+    return state
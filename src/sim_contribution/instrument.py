@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+def max_rss_bytes() -> int | None:
+    # Process memory high-water mark; None where the resource module is unavailable (Windows).
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return int(rss) if sys.platform == "darwin" else int(rss) * 1024
+
+
+@dataclass
+class StageRecord:
+    seconds: float = 0.0
+    calls: int = 0
+    # High-water mark when a `stage` block last finished; None for per-period `add` totals.
+    max_rss_bytes: int | None = None
+
+
+@dataclass
+class StageTimer:
+    # Wall time per named stage, accumulated over repeated entries (e.g. one per period).
+    stages: dict[str, StageRecord] = field(default_factory=dict)
+
+    def add(self, name: str, seconds: float) -> None:
+        rec = self.stages.setdefault(name, StageRecord())
+        rec.seconds += seconds
+        rec.calls += 1
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+            self.stages[name].max_rss_bytes = max_rss_bytes()
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "total_seconds": sum(rec.seconds for rec in self.stages.values()),
+            "max_rss_bytes": max_rss_bytes(),
+            "stages": [
+                {
+                    "name": name,
+                    "seconds": rec.seconds,
+                    "calls": rec.calls,
+                    "max_rss_bytes": rec.max_rss_bytes,
+                }
+                for name, rec in self.stages.items()
+            ],
+        }
+
+
+def write_timings(timer: StageTimer, path: Path) -> None:
+    path.write_text(json.dumps(timer.as_dict(), indent=2) + "\n", encoding="utf-8")
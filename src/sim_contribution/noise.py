@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+import numpy as np
+
+# Number of float64 draws per generated chunk (8 MiB), independent of T.
+CHUNK_VALUES = 1 << 20
+
+
+def precompute_eps(T: int, m: int, sigma: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.normal(loc=0.0, scale=sigma, size=(T, m)).astype(float)
+
+
+def iter_noise_rows(
+    T: int,
+    m: int,
+    sigma: float,
+    seed: int,
+    chunk_periods: int | None = None,
+) -> Iterator[np.ndarray]:
+    # Drawing the (T, m) matrix in row chunks from one generator yields the same values as
+    # `precompute_eps`, but only `chunk_periods` rows are alive at a time.
+    if chunk_periods is None:
+        chunk_periods = max(1, CHUNK_VALUES // max(m, 1))
+    if chunk_periods <= 0:
+        raise ValueError("chunk_periods must be positive")
+
+    rng = np.random.default_rng(seed)
+    done = 0
+    while done < T:
+        rows = min(chunk_periods, T - done)
+        chunk = rng.normal(loc=0.0, scale=sigma, size=(rows, m))
+        yield from chunk
+        done += rows
@@ -1,26 +1,50 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import math
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
 from itertools import combinations
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING
 
 import numpy as np
 
-from sim_contribution.bitmask import lowest_bit_index
+from sim_contribution.bitmask import (
+    lowest_bit_index,
+    mask_from_members,
+    members_array,
+    members_list,
+)
 from sim_contribution.coalitions import Coalitions
 
+if TYPE_CHECKING:
+    from numpy.typing import DTypeLike
+
+ORACLE_METHODS = ("vectorized", "loop")
+# float64 dp entries per batched pass of compute_oracle_values (128 MiB).
+ORACLE_BATCH_VALUES = 1 << 24
+# What compute_oracle_value keeps to reconstruct the partition; see its comment.
+CHOICE_TABLES = ("mask", "code", "none")
+# A mask of popcount k has 1 + (k - 1) + C(k - 1, 2) candidates, at most 277 for n = 24.
+CHOICE_CODE_DTYPE = np.dtype(np.uint16)
+# Smallest slice of a popcount layer handed to one worker by the parallel DP.
+ORACLE_PARALLEL_MIN_MASKS = 1 << 14
+
 
 @dataclass(frozen=True)
 class OracleResult:
     value: float
     partition: list[int] | None = None
+    # Bounds on the optimum; equal to `value` for the exact DP.
+    lower_bound: float | None = None
+    upper_bound: float | None = None
 
 
-def compute_oracle_value(n: int, coalitions: Coalitions, reconstruct: bool = False) -> OracleResult:
-    if n <= 0:
-        raise ValueError("n must be positive")
-    if n > 24:
-        raise ValueError("n is too large for 2^n DP; choose n<=24 or implement an approximation")
-
+def _dp_loop(
+    n: int, coalitions: Coalitions, reconstruct: bool
+) -> tuple[np.ndarray, np.ndarray | None]:
     full_mask = (1 << n) - 1
     dp = np.full((1 << n,), -np.inf, dtype=float)
     dp[0] = 0.0
@@ -57,15 +81,295 @@ def compute_oracle_value(n: int, coalitions: Coalitions, reconstruct: bool = Fal
         if choice is not None:
             choice[mask] = best_s
 
+    return dp, choice
+
+
+def _mu_tables(n: int, coalitions: Coalitions) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Any leading axes of coalitions.mu (e.g. replications) are kept in front of the player axes.
+    lead = coalitions.mu.shape[:-1]
+    mu1 = np.full(lead + (n,), -np.inf, dtype=float)
+    mu2 = np.full(lead + (n, n), -np.inf, dtype=float)
+    mu3 = np.full(lead + (n, n, n), -np.inf, dtype=float)
+    mem = coalitions.members
+    for k, table in ((1, mu1), (2, mu2), (3, mu3)):
+        rows = coalitions.sizes == k
+        table[(..., *mem[rows, :k].T)] = coalitions.mu[..., rows]
+    return mu1, mu2, mu3
+
+
+def _bit(idx: np.ndarray) -> np.ndarray:
+    return np.left_shift(np.int64(1), idx.astype(np.int64))
+
+
+def _popcount_layers(n: int) -> Iterator[np.ndarray]:
+    # The int32 masks of popcount 1, 2, ..., n in turn, each layer in ascending order. The masks of
+    # popcount k - 1 below 1 << c are a prefix of their layer, so layer k is those prefixes with bit
+    # c added, c = k - 1..n - 1: each layer comes from the previous one, with no 2^n index or sort.
+    layer = np.zeros((1,), dtype=np.int32)
+    for k in range(1, n + 1):
+        prefixes = [layer[: math.comb(c, k - 1)] | np.int32(1 << c) for c in range(k - 1, n)]
+        layer = np.concatenate(prefixes)
+        yield layer
+
+
+def _fill_layer(
+    dp: np.ndarray,
+    choice: np.ndarray | None,
+    layer: np.ndarray,
+    k: int,
+    mu_tables: tuple[np.ndarray, np.ndarray, np.ndarray],
+) -> None:
+    # dp (and choice) for masks of popcount k, reading only dp of smaller masks. Candidates are
+    # visited in the same order as `_dp_loop` with a strict `>`, so ties resolve to the same
+    # coalition. Leading axes of the mu tables are solved side by side. A uint16 `choice` stores
+    # the candidate's position in that order (see _candidate_from_code) instead of its mask.
+    mu1, mu2, mu3 = mu_tables
+    codes = choice is not None and choice.dtype == CHOICE_CODE_DTYPE
+    layer = layer.astype(np.int64)
+    bits = members_array(layer, k, dtype=np.int8)
+    i = bits[:, 0]
+    s1 = _bit(i)
+
+    best = mu1[..., i] + dp[..., layer ^ s1]
+    best_s = np.zeros(layer.shape, dtype=CHOICE_CODE_DTYPE) if codes else s1
+
+    candidates = [(a,) for a in range(1, k)] + list(combinations(range(1, k), 2))
+    for code, partners in enumerate(candidates, start=1):
+        s = s1
+        for a in partners:
+            s = s | _bit(bits[:, a])
+        if len(partners) == 1:
+            val = mu2[..., i, bits[:, partners[0]]] + dp[..., layer ^ s]
+        else:
+            val = mu3[..., i, bits[:, partners[0]], bits[:, partners[1]]] + dp[..., layer ^ s]
+        better = val > best
+        best = np.where(better, val, best)
+        if choice is not None:
+            best_s = np.where(better, CHOICE_CODE_DTYPE.type(code) if codes else s, best_s)
+
+    dp[..., layer] = best
+    if choice is not None:
+        choice[..., layer] = best_s
+
+
+def _dp_layered(
+    n: int,
+    coalitions: Coalitions,
+    choice_dtype: DTypeLike | None = None,
+    dp_dtype: DTypeLike = np.float64,
+) -> tuple[np.ndarray, np.ndarray | None]:
+    # Every mask only reads dp of strictly smaller popcount, so each popcount layer is filled in one
+    # vectorized pass. choice_dtype None skips the choice table.
+    lead = coalitions.mu.shape[:-1]
+    dp = np.full(lead + (1 << n,), -np.inf, dtype=dp_dtype)
+    dp[..., 0] = 0.0
+    choice = np.zeros(lead + (1 << n,), dtype=choice_dtype) if choice_dtype is not None else None
+
+    mu_tables = _mu_tables(n, coalitions)
+    for k, layer in enumerate(_popcount_layers(n), start=1):
+        _fill_layer(dp, choice, layer, k, mu_tables)
+    return dp, choice
+
+
+# Per-process views of the shared tables while a pool from `_dp_parallel` is alive.
+_shared_blocks: list[shared_memory.SharedMemory] = []
+_shared_tables: dict[str, np.ndarray] = {}
+
+
+def _attach_shared(
+    names: dict[str, tuple[str, str, int]],
+    mu_tables: tuple[np.ndarray, np.ndarray, np.ndarray],
+) -> None:
+    for key, (name, dtype, length) in names.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _shared_blocks.append(shm)
+        _shared_tables[key] = np.ndarray((length,), dtype=dtype, buffer=shm.buf)
+    _shared_tables["mu1"], _shared_tables["mu2"], _shared_tables["mu3"] = mu_tables
+
+
+def _fill_shared_chunk(task: tuple[int, int, int]) -> None:
+    k, lo, hi = task
+    tables = _shared_tables
+    mu_tables = (tables["mu1"], tables["mu2"], tables["mu3"])
+    _fill_layer(tables["dp"], tables.get("choice"), tables["layer"][lo:hi], k, mu_tables)
+
+
+@contextmanager
+def _dp_parallel(
+    n: int,
+    coalitions: Coalitions,
+    workers: int,
+    choice_dtype: DTypeLike | None = None,
+    dp_dtype: DTypeLike = np.float64,
+) -> Iterator[dict[str, np.ndarray]]:
+    # `_dp_layered` with each popcount layer split across worker processes. dp, choice and the
+    # current layer live in multiprocessing.shared_memory, so workers write their slice of a layer
+    # in place; a layer starts only once every slice of the previous one is done. Yields the shared
+    # "dp" (and "choice") tables without copying them; the dict is cleared and the blocks are
+    # unlinked when the block exits, so no reference to the tables may outlive it.
+    # (dtype, length) per table; the largest popcount layer is C(n, n // 2).
+    specs = {
+        "dp": (np.dtype(dp_dtype), 1 << n),
+        "layer": (np.dtype(np.int32), math.comb(n, n // 2)),
+    }
+    if choice_dtype is not None:
+        specs["choice"] = (np.dtype(choice_dtype), 1 << n)
+    blocks: dict[str, shared_memory.SharedMemory] = {}
+    views: dict[str, np.ndarray] = {}
+    try:
+        for key, (dtype, length) in specs.items():
+            blocks[key] = shared_memory.SharedMemory(create=True, size=length * dtype.itemsize)
+            views[key] = np.ndarray((length,), dtype=dtype, buffer=blocks[key].buf)
+        views["dp"].fill(-np.inf)
+        views["dp"][0] = 0.0
+        if "choice" in views:
+            views["choice"].fill(0)
+
+        names = {
+            key: (blocks[key].name, dtype.str, length) for key, (dtype, length) in specs.items()
+        }
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_attach_shared,
+            initargs=(names, _mu_tables(n, coalitions)),
+        ) as pool:
+            for k, layer in enumerate(_popcount_layers(n), start=1):
+                size = layer.shape[0]
+                views["layer"][:size] = layer
+                pieces = max(1, min(workers, size // ORACLE_PARALLEL_MIN_MASKS))
+                bounds = np.linspace(0, size, pieces + 1).astype(np.int64)
+                list(
+                    pool.map(
+                        _fill_shared_chunk,
+                        [(k, int(a), int(b)) for a, b in zip(bounds, bounds[1:])],
+                    )
+                )
+
+        yield views
+    finally:
+        # The buffers can only be closed once no array views them.
+        views.clear()
+        for shm in blocks.values():
+            shm.close()
+            shm.unlink()
+
+
+def compute_oracle_values(n: int, coalitions: Coalitions) -> np.ndarray:
+    # Exact optimum for each row of a (R, m) coalitions.mu over the same coalition structure, e.g.
+    # one row per replication seed; row r equals compute_oracle_value on that row alone.
+    if n <= 0:
+        raise ValueError("n must be positive")
+    if n > 24:
+        raise ValueError("n is too large for 2^n DP; choose n<=24 or implement an approximation")
+    mu = np.atleast_2d(coalitions.mu)
+    # Solve as many rows at once as keep the (rows, 2^n) dp table within ORACLE_BATCH_VALUES.
+    step = max(1, ORACLE_BATCH_VALUES >> n)
+    values = np.empty((mu.shape[0],), dtype=float)
+    for lo in range(0, mu.shape[0], step):
+        dp, _ = _dp_layered(n, replace(coalitions, mu=mu[lo : lo + step]))
+        values[lo : lo + step] = dp[:, (1 << n) - 1]
+    return values
+
+
+def _candidate_from_code(mask: int, code: int) -> int:
+    # Inverse of the uint16 choice code: the code-th candidate of `mask` in `_fill_layer` order
+    # (lowest member alone, then with each other member, then with each pair of other members).
+    bits = members_list(mask)
+    k = len(bits)
+    if code < k:
+        partners = [bits[code]] if code > 0 else []
+    else:
+        a, b = list(combinations(range(1, k), 2))[code - k]
+        partners = [bits[a], bits[b]]
+    return mask_from_members([bits[0], *partners])
+
+
+def _recover_choice(
+    mask: int, dp: np.ndarray, mu_tables: tuple[np.ndarray, np.ndarray, np.ndarray]
+) -> int:
+    # The coalition `_fill_layer` chose for `mask`, re-derived from dp: the same candidate values
+    # in the same order with a strict `>`, so it agrees with a stored choice table.
+    mu1, mu2, mu3 = mu_tables
+    i, *rest = members_list(mask)
+    s1 = 1 << i
+    best = mu1[i] + dp[mask ^ s1]
+    best_s = s1
+    for j in rest:
+        s2 = s1 | (1 << j)
+        val = mu2[i, j] + dp[mask ^ s2]
+        if val > best:
+            best, best_s = val, s2
+    for j, k in combinations(rest, 2):
+        s3 = s1 | (1 << j) | (1 << k)
+        val = mu3[i, j, k] + dp[mask ^ s3]
+        if val > best:
+            best, best_s = val, s3
+    return best_s
+
+
+def compute_oracle_value(
+    n: int,
+    coalitions: Coalitions,
+    reconstruct: bool = False,
+    method: str = "vectorized",
+    workers: int = 1,
+    choice_table: str = "mask",
+    dp_dtype: DTypeLike = np.float64,
+) -> OracleResult:
+    # workers > 1 splits each popcount layer of the vectorized DP across that many processes.
+    # With reconstruct, choice_table picks what is kept for the partition: "mask" (int64 coalition
+    # masks), "code" (uint16 candidate codes, a quarter of the size) or "none" (no table; the
+    # partition is re-derived from dp). dp_dtype=np.float32 halves dp; the value is then rounded.
+    if n <= 0:
+        raise ValueError("n must be positive")
+    if n > 24:
+        raise ValueError("n is too large for 2^n DP; choose n<=24 or implement an approximation")
+    if workers <= 0:
+        raise ValueError("workers must be positive")
+    if choice_table not in CHOICE_TABLES:
+        raise ValueError(
+            f"unknown choice table: {choice_table} (choose from {', '.join(CHOICE_TABLES)})"
+        )
+    compact = choice_table != "mask" or np.dtype(dp_dtype) != np.float64
+    if method == "loop" and compact:
+        raise ValueError("the loop method only supports choice_table='mask' and float64 dp")
+
+    choice_dtype: np.dtype | None = None
+    if reconstruct and choice_table != "none":
+        choice_dtype = CHOICE_CODE_DTYPE if choice_table == "code" else np.dtype(np.int64)
+    if method == "vectorized" and workers > 1:
+        with _dp_parallel(n, coalitions, workers, choice_dtype, dp_dtype) as tables:
+            return _oracle_result(n, coalitions, tables["dp"], tables.get("choice"), reconstruct)
+    if method == "vectorized":
+        dp, choice = _dp_layered(n, coalitions, choice_dtype, dp_dtype)
+    elif method == "loop":
+        dp, choice = _dp_loop(n, coalitions, reconstruct)
+    else:
+        raise ValueError(
+            f"unknown oracle method: {method} (choose from {', '.join(ORACLE_METHODS)})"
+        )
+    return _oracle_result(n, coalitions, dp, choice, reconstruct)
+
+
+def _oracle_result(
+    n: int, coalitions: Coalitions, dp: np.ndarray, choice: np.ndarray | None, reconstruct: bool
+) -> OracleResult:
+    full_mask = (1 << n) - 1
+    value = float(dp[full_mask])
     if not reconstruct:
-        return OracleResult(value=float(dp[full_mask]), partition=None)
+        return OracleResult(value=value, partition=None, lower_bound=value, upper_bound=value)
 
+    mu_tables = _mu_tables(n, coalitions) if choice is None else None
     partition: list[int] = []
     mask = full_mask
-    assert choice is not None
     while mask:
-        s = int(choice[mask])
+        if choice is None:
+            assert mu_tables is not None
+            s = _recover_choice(mask, dp, mu_tables)
+        elif choice.dtype == CHOICE_CODE_DTYPE:
+            s = _candidate_from_code(mask, int(choice[mask]))
+        else:
+            s = int(choice[mask])
         partition.append(s)
         mask ^= s
-    return OracleResult(value=float(dp[full_mask]), partition=partition)
-
+    return OracleResult(value=value, partition=partition, lower_bound=value, upper_bound=value)
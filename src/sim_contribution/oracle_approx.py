@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from itertools import combinations
+
+import numpy as np
+
+from sim_contribution.algorithms import build_greedy_engine, greedy_engine_max
+from sim_contribution.bitmask import mask_from_members
+from sim_contribution.coalitions import Coalitions, coalition_rank, rank_members
+from sim_contribution.oracle import OracleResult
+
+
+def _set_partitions(items: tuple[int, ...]) -> list[list[tuple[int, ...]]]:
+    if not items:
+        return [[]]
+    first, rest = items[0], items[1:]
+    out: list[list[tuple[int, ...]]] = []
+    for extra in [(), *((x,) for x in rest), *combinations(rest, 2)]:
+        remaining = tuple(x for x in rest if x not in extra)
+        for tail in _set_partitions(remaining):
+            out.append([(first, *extra), *tail])
+    return out
+
+
+@lru_cache(maxsize=None)
+def _block_patterns(u: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    # Every partition of {0..u-1} into blocks of size <= 3, flattened to (B, 3) local member rows
+    # (padding repeats the first member), the size of each block and the pattern it belongs to.
+    patterns = _set_partitions(tuple(range(u)))
+    n_blocks = sum(len(p) for p in patterns)
+    blocks = np.zeros((n_blocks, 3), dtype=np.int64)
+    sizes = np.empty((n_blocks,), dtype=np.int64)
+    pattern_id = np.empty((n_blocks,), dtype=np.int64)
+    row = 0
+    for pid, pattern in enumerate(patterns):
+        for block in pattern:
+            blocks[row, :] = block[0]
+            blocks[row, : len(block)] = block
+            sizes[row] = len(block)
+            pattern_id[row] = pid
+            row += 1
+    return blocks, sizes, pattern_id, len(patterns)
+
+
+def _best_regrouping(
+    union: np.ndarray, n: int, mu: np.ndarray
+) -> tuple[float, np.ndarray, np.ndarray]:
+    # Best way to regroup `union` (sorted) into teams of size <= 3. Ranks are computed inline with
+    # the `coalition_rank` formulas since this runs once per team pair.
+    blocks, sizes, pattern_id, n_patterns = _block_patterns(int(union.shape[0]))
+    g = union[blocks]
+    i, j, k = g[:, 0], g[:, 1], g[:, 2]
+    n_pairs = n * (n - 1) // 2
+    n_triples = n_pairs * (n - 2) // 3
+    pair_rank = n + n_pairs - 1 - (n - 1 - i) * (n - 2 - i) // 2 - (n - 1 - j)
+    triple_rank = (
+        n
+        + n_pairs
+        + n_triples
+        - 1
+        - (n - 1 - i) * (n - 2 - i) * (n - 3 - i) // 6
+        - (n - 1 - j) * (n - 2 - j) // 2
+        - (n - 1 - k)
+    )
+    idx = np.where(sizes == 1, i, np.where(sizes == 2, pair_rank, triple_rank))
+    values = np.bincount(pattern_id, weights=mu[idx], minlength=n_patterns)
+    best = int(np.argmax(values))
+    rows = pattern_id == best
+    return float(values[best]), g[rows], sizes[rows]
+
+
+def local_search_partition(
+    n: int,
+    coalitions: Coalitions,
+    teams: list[tuple[int, ...]],
+    max_rounds: int = 20,
+    tol: float = 1e-12,
+) -> list[tuple[int, ...]]:
+    # Re-optimizes the union of every pair of teams (and every team alone) over all ways to regroup
+    # it into blocks of size <= 3, which covers swap, merge and split moves. After the first round
+    # only pairs touching a team changed in the previous round are revisited.
+    mu = coalitions.mu
+    teams = [tuple(sorted(t)) for t in teams]
+    team_mu = [float(mu[rank_members(t, n)]) for t in teams]
+    changed = [True] * len(teams)
+
+    for _ in range(max_rounds):
+        improved = False
+        now_changed = [False] * len(teams)
+        a = 0
+        while a < len(teams):
+            b = a
+            while b < len(teams):
+                if (b == a and len(teams[a]) == 1) or not (changed[a] or changed[b]):
+                    b += 1
+                    continue
+                union = np.array(
+                    sorted(teams[a] + teams[b]) if b != a else teams[a], dtype=np.int64
+                )
+                current = team_mu[a] + (team_mu[b] if b != a else 0.0)
+                value, rows, sizes = _best_regrouping(union, n, mu)
+                if value <= current + tol:
+                    b += 1
+                    continue
+
+                improved = True
+                new_teams = [tuple(int(x) for x in row[:size]) for row, size in zip(rows, sizes)]
+                new_mu = [float(mu[rank_members(t, n)]) for t in new_teams]
+                teams[a], team_mu[a], now_changed[a] = new_teams[0], new_mu[0], True
+                extra_from = 1
+                if b != a:
+                    if len(new_teams) >= 2:
+                        teams[b], team_mu[b], now_changed[b] = new_teams[1], new_mu[1], True
+                        extra_from = 2
+                    else:
+                        for lst in (teams, team_mu, changed, now_changed):
+                            lst.pop(b)
+                        b -= 1
+                extra = new_teams[extra_from:]
+                teams.extend(extra)
+                team_mu.extend(new_mu[extra_from:])
+                changed.extend([True] * len(extra))
+                now_changed.extend([True] * len(extra))
+                b += 1
+            a += 1
+        if not improved:
+            break
+        changed = now_changed
+    return teams
+
+
+def _member_columns(coalitions: Coalitions, n: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Contiguous member columns with padding mapped to slot n, which holds lam = 0.
+    mem = coalitions.members
+    c0, c1, c2 = (np.where(mem[:, k] >= 0, mem[:, k], n).astype(np.intp) for k in range(3))
+    return c0, c1, c2
+
+
+def _dual_value(
+    lam: np.ndarray,
+    cols: tuple[np.ndarray, np.ndarray, np.ndarray],
+    mu: np.ndarray,
+) -> tuple[float, np.ndarray, np.ndarray]:
+    # Lagrangian of the set-partitioning LP with the cover constraints dualized:
+    # L(lam) = sum_i lam_i + sum_S max(0, mu_S - lam(S)), evaluated over the given coalitions.
+    # Over all coalitions it bounds the LP optimum, and hence the integer optimum, from above.
+    n = lam.shape[0]
+    lam_ext = np.append(lam, 0.0)
+    lam_s = lam_ext[cols[0]]
+    lam_s += lam_ext[cols[1]]
+    lam_s += lam_ext[cols[2]]
+    reduced = mu - lam_s
+    pos = np.flatnonzero(reduced > 0)
+    value = float(lam.sum() + reduced[pos].sum())
+    used = np.sum(np.stack([np.bincount(c[pos], minlength=n + 1) for c in cols]), axis=0)
+    grad = 1.0 - used[:n]
+    return value, grad, reduced
+
+
+def lp_upper_bound(
+    n: int,
+    coalitions: Coalitions,
+    lower_bound: float,
+    max_iter: int = 300,
+    price_every: int = 20,
+    active_per_player: int = 50,
+    rel_gap: float = 1e-6,
+    initial_lam: np.ndarray | None = None,
+) -> tuple[float, np.ndarray]:
+    # Subgradient descent on the LP dual. Steps use only the coalitions with the largest reduced
+    # cost at the last pricing pass; every `price_every` steps all coalitions are re-priced, and
+    # only those full evaluations are taken as the (valid) bound. Returns the bound and its
+    # multipliers.
+    cols = _member_columns(coalitions, n)
+    mu = coalitions.mu
+    m = int(mu.shape[0])
+    n_active = min(m, active_per_player * n)
+
+    if initial_lam is not None:
+        lam = initial_lam.astype(float, copy=True)
+    else:
+        # lam_i = max_{S∋i} mu_S/|S| is dual feasible (lam(S) >= mu_S for every S), a valid start.
+        lam = np.full((n,), -np.inf)
+        share = mu / coalitions.sizes
+        for c in cols:
+            valid = c < n
+            np.maximum.at(lam, c[valid], share[valid])
+
+    best = np.inf
+    best_lam = lam.copy()
+    theta = 1.0
+    stall = 0
+    last_value = np.inf
+    active_cols = cols
+    active_mu = mu
+    for it in range(max_iter + 1):
+        if it % price_every == 0 or it == max_iter:
+            value, grad, reduced = _dual_value(lam, cols, mu)
+            if value < best:
+                best = value
+                best_lam = lam.copy()
+            if it == max_iter or best - lower_bound <= rel_gap * max(1.0, abs(lower_bound)):
+                break
+            active = (
+                np.argpartition(-reduced, n_active - 1)[:n_active] if n_active < m else np.arange(m)
+            )
+            active_cols = (cols[0][active], cols[1][active], cols[2][active])
+            active_mu = mu[active]
+        else:
+            value, grad, _ = _dual_value(lam, active_cols, active_mu)
+
+        if value < last_value:
+            stall = 0
+        else:
+            stall += 1
+            if stall >= 10:
+                theta /= 2.0
+                stall = 0
+        last_value = value
+
+        norm2 = float(grad @ grad)
+        if norm2 == 0.0:
+            # Restricted problem is solved; force a pricing pass next.
+            it_next = (it // price_every + 1) * price_every
+            if it_next > max_iter:
+                break
+            continue
+        # Polyak step towards the best known primal value.
+        lam = lam - theta * max(value - lower_bound, 0.0) / norm2 * grad
+    return best, best_lam
+
+
+def _teams_from_indices(coalitions: Coalitions, indices: list[int]) -> list[tuple[int, ...]]:
+    return [tuple(int(x) for x in coalitions.members[i] if x >= 0) for i in indices]
+
+
+def _partition_value(teams: list[tuple[int, ...]], coalitions: Coalitions, n: int) -> float:
+    rows = np.full((len(teams), 3), -1, dtype=np.int64)
+    for r, team in enumerate(teams):
+        rows[r, : len(team)] = team
+    return float(coalitions.mu[coalition_rank(rows, n)].sum())
+
+
+def approximate_oracle(
+    n: int,
+    coalitions: Coalitions,
+    max_rounds: int = 20,
+    max_iter: int = 300,
+    seed: int = 0,
+) -> OracleResult:
+    # Lower bound: greedy by mu, improved by pairwise local search. Upper bound: LP dual. The dual
+    # multipliers then seed a second greedy start on reduced costs, which follows the LP solution
+    # and often escapes local optima that pairwise moves cannot leave.
+    if n <= 0:
+        raise ValueError("n must be positive")
+
+    engine = build_greedy_engine(coalitions)
+    rng = np.random.default_rng(seed)
+
+    start = greedy_engine_max(engine, coalitions.mu, rng)
+    assert start.indices is not None
+    teams = local_search_partition(
+        n, coalitions, _teams_from_indices(coalitions, start.indices), max_rounds
+    )
+    lower = _partition_value(teams, coalitions, n)
+
+    upper, lam = lp_upper_bound(n, coalitions, lower, max_iter=max_iter)
+
+    if upper - lower > 1e-9 * max(1.0, abs(lower)):
+        _, _, reduced = _dual_value(lam, _member_columns(coalitions, n), coalitions.mu)
+        lp_start = greedy_engine_max(engine, reduced, rng)
+        assert lp_start.indices is not None
+        lp_teams = local_search_partition(
+            n, coalitions, _teams_from_indices(coalitions, lp_start.indices), max_rounds
+        )
+        lp_lower = _partition_value(lp_teams, coalitions, n)
+        if lp_lower > lower:
+            teams, lower = lp_teams, lp_lower
+            # Polyak steps aim at the primal value, so a better lower bound tightens the dual too.
+            upper2, _ = lp_upper_bound(n, coalitions, lower, max_iter=max_iter, initial_lam=lam)
+            upper = min(upper, upper2)
+
+    return OracleResult(
+        value=lower,
+        partition=[mask_from_members(t) for t in teams],
+        lower_bound=lower,
+        upper_bound=max(upper, lower),
+    )
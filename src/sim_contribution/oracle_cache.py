@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from sim_contribution.defaults import DEFAULT_ORACLE_CACHE_BYTES
+from sim_contribution.model import PlayerParams
+from sim_contribution.oracle import OracleResult
+
+# Bump when the oracle algorithms change in a way that alters their results.
+ORACLE_CACHE_VERSION = 1
+
+
+def oracle_key(players: PlayerParams, mu: np.ndarray, mode: str) -> str:
+    h = hashlib.sha256(f"v{ORACLE_CACHE_VERSION}:{mode}".encode("utf-8"))
+    for arr in (players.a, players.c, players.skills, players.b, mu):
+        arr = np.ascontiguousarray(arr)
+        h.update(f"{arr.dtype.str}{arr.shape}".encode("utf-8"))
+        h.update(arr.tobytes())
+    return h.hexdigest()[:32]
+
+
+@dataclass(frozen=True)
+class OracleCache:
+    # One JSON file per key; reads refresh the mtime, and the oldest files are evicted once the
+    # directory grows beyond `max_bytes`.
+    cache_dir: Path
+    max_bytes: int = DEFAULT_ORACLE_CACHE_BYTES
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> OracleResult | None:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            result = OracleResult(
+                value=float(entry["value"]),
+                partition=entry["partition"],
+                lower_bound=entry["lower_bound"],
+                upper_bound=entry["upper_bound"],
+            )
+        except FileNotFoundError:
+            return None
+        except (KeyError, TypeError, ValueError):
+            # A corrupt or partial entry is a miss; drop it so the recomputed result replaces it.
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return result
+
+    def put(self, key: str, result: OracleResult) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "value": result.value,
+            "partition": [int(s) for s in result.partition]
+            if result.partition is not None
+            else None,
+            "lower_bound": result.lower_bound,
+            "upper_bound": result.upper_bound,
+        }
+        path = self._path(key)
+        tmp = path.with_suffix(f".json.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(payload) + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self) -> None:
+        entries: list[tuple[float, int, Path]] = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
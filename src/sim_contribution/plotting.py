@@ -1,16 +1,65 @@
 from __future__ import annotations
 
+from collections.abc import Iterator, Mapping
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Protocol
 
-import matplotlib.pyplot as plt
-import pandas as pd
+import numpy as np
 
+from sim_contribution.defaults import DEFAULT_INGEST_CHUNK_ROWS
+from sim_contribution.instrument import StageTimer
 
-def plot_totals_and_regret(results: dict[str, pd.DataFrame], out_path: Path) -> None:
-    fig, axes = plt.subplots(2, 1, figsize=(10, 7), sharex=True)
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+# Longer series are averaged into this many buckets before drawing, so plotting time does not
+# grow with T.
+MAX_PLOT_POINTS = 2000
+
+
+# A table is anything indexable by column name: a DataFrame or a `storage.Table` from load_bundle.
+class Columns(Protocol):
+    def __getitem__(self, name: str, /) -> Any: ...
+
+
+def _figure(figsize: tuple[float, float]) -> Figure:
+    # matplotlib is imported on first use; Figure renders without pyplot's backend machinery.
+    from matplotlib.figure import Figure
+
+    return Figure(figsize=figsize)
+
+
+def _save(fig: Figure, out_path: Path) -> None:
+    fig.tight_layout()
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(out_path, dpi=150)
+
+
+def _downsample(
+    t: np.ndarray, ys: list[np.ndarray], max_points: int = MAX_PLOT_POINTS
+) -> tuple[np.ndarray, list[np.ndarray]]:
+    if t.shape[0] <= max_points:
+        return t, ys
+    edges = np.linspace(0, t.shape[0], max_points + 1).astype(np.int64)
+    counts = np.diff(edges)
+
+    def bucket_mean(x: np.ndarray) -> np.ndarray:
+        return np.add.reduceat(np.asarray(x, dtype=float), edges[:-1]) / counts
+
+    return bucket_mean(t), [bucket_mean(y) for y in ys]
+
+
+def _series(df: Columns, *names: str) -> tuple[np.ndarray, list[np.ndarray]]:
+    return _downsample(np.asarray(df["t"]), [np.asarray(df[name]) for name in names])
+
+
+def plot_totals_and_regret(results: Mapping[str, Columns], out_path: Path) -> None:
+    fig = _figure((10, 7))
+    axes = fig.subplots(2, 1, sharex=True)
     for algo, df in results.items():
-        axes[0].plot(df["t"], df["total"], label=algo)
-        axes[1].plot(df["t"], df["regret"], label=algo)
+        t, (total, regret) = _series(df, "total", "regret")
+        axes[0].plot(t, total, label=algo)
+        axes[1].plot(t, regret, label=algo)
 
     axes[0].set_title("Total (true mu)")
     axes[0].set_ylabel("Total")
@@ -22,55 +71,142 @@ def plot_totals_and_regret(results: dict[str, pd.DataFrame], out_path: Path) ->
     axes[1].set_ylabel("Regret")
     axes[1].grid(True, alpha=0.3)
 
-    fig.tight_layout()
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    fig.savefig(out_path, dpi=150)
-    plt.close(fig)
+    _save(fig, out_path)
 
 
-def plot_team_mu_hist(samples: dict[str, pd.DataFrame], out_path: Path, bins: int = 30) -> None:
-    fig, ax = plt.subplots(figsize=(10, 5))
-    for algo, df in samples.items():
-        ax.hist(df["team_mu"].to_numpy(dtype=float), bins=bins, alpha=0.4, density=True, label=algo)
+def team_mu_histograms(
+    samples: Mapping[str, Columns], bins: int = 30
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    # Shared bin edges and per-algorithm counts; one vectorized pass over the samples.
+    values = {algo: np.asarray(df["team_mu"], dtype=float) for algo, df in samples.items()}
+    nonempty = [v for v in values.values() if v.shape[0] > 0]
+    lo = min((float(v.min()) for v in nonempty), default=0.0)
+    hi = max((float(v.max()) for v in nonempty), default=1.0)
+    edges = np.histogram_bin_edges(np.array([lo, hi]), bins=bins)
+    return edges, {algo: np.histogram(v, bins=edges)[0] for algo, v in values.items()}
+
+
+def stream_team_mu_histograms(
+    paths: Mapping[str, Path], bins: int = 30, chunk_rows: int = DEFAULT_INGEST_CHUNK_ROWS
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    # team_mu_histograms over team_mu_samples files read `chunk_rows` rows at a time: one pass
+    # for the range and one for the counts, so memory stays bounded however long the run was.
+    from sim_contribution.storage import iter_table_chunks
+
+    def chunks(path: Path) -> Iterator[np.ndarray]:
+        for chunk in iter_table_chunks(path, chunk_rows, ("team_mu",)):
+            yield np.asarray(chunk["team_mu"], dtype=float)
+
+    lo, hi = np.inf, -np.inf
+    for path in paths.values():
+        for v in chunks(path):
+            if v.shape[0] > 0:
+                lo, hi = min(lo, float(v.min())), max(hi, float(v.max()))
+    if lo > hi:
+        lo, hi = 0.0, 1.0
+    edges = np.histogram_bin_edges(np.array([lo, hi]), bins=bins)
+    counts = {algo: np.zeros((bins,), dtype=np.int64) for algo in paths}
+    for algo, path in paths.items():
+        for v in chunks(path):
+            counts[algo] += np.histogram(v, bins=edges)[0]
+    return edges, counts
+
+
+def merge_team_mu_hist(
+    hists: Mapping[str, Columns],
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    # team_mu_hist tables (one row per window and bin) summed over windows. Every algorithm of a
+    # run shares the bins, which only depend on coalitions.mu.
+    edges: np.ndarray | None = None
+    counts: dict[str, np.ndarray] = {}
+    for algo, df in hists.items():
+        lo = np.asarray(df["bin_lo"], dtype=float)
+        bin_lo, bin_idx = np.unique(lo, return_inverse=True)
+        algo_edges = np.append(bin_lo, np.max(np.asarray(df["bin_hi"], dtype=float)))
+        if edges is None:
+            edges = algo_edges
+        elif not np.array_equal(edges, algo_edges):
+            raise ValueError("team_mu histograms of one plot must share their bins")
+        weights = np.asarray(df["count"], dtype=float)
+        counts[algo] = np.bincount(bin_idx, weights=weights, minlength=bin_lo.shape[0])
+    if edges is None:
+        raise ValueError("no team_mu histograms to merge")
+    return edges, counts
+
+
+def plot_team_mu_hist_counts(
+    edges: np.ndarray, counts: Mapping[str, np.ndarray], out_path: Path
+) -> None:
+    fig = _figure((10, 5))
+    ax = fig.subplots()
+    widths = np.diff(edges)
+    for algo, c in counts.items():
+        total = float(np.sum(c))
+        density = c / (total * widths) if total > 0 else np.zeros_like(widths)
+        ax.stairs(density, edges, fill=True, alpha=0.4, label=algo)
     ax.set_title("Team mu distribution (all periods)")
     ax.set_xlabel("mu(S)")
     ax.set_ylabel("density")
     ax.grid(True, alpha=0.3)
     ax.legend()
-    fig.tight_layout()
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    fig.savefig(out_path, dpi=150)
-    plt.close(fig)
+    _save(fig, out_path)
 
 
-def plot_team_mu_time_stats(results: dict[str, pd.DataFrame], out_path: Path) -> None:
-    fig, ax = plt.subplots(figsize=(10, 5))
+def plot_team_mu_hist(samples: Mapping[str, Columns], out_path: Path, bins: int = 30) -> None:
+    edges, counts = team_mu_histograms(samples, bins=bins)
+    plot_team_mu_hist_counts(edges, counts, out_path)
+
+
+def plot_team_mu_time_stats(results: Mapping[str, Columns], out_path: Path) -> None:
+    fig = _figure((10, 5))
+    ax = fig.subplots()
     for algo, df in results.items():
-        ax.plot(df["t"], df["team_mu_min"], label=f"{algo}: min", alpha=0.8)
-        ax.plot(df["t"], df["team_mu_median"], label=f"{algo}: median", alpha=0.8)
-        ax.plot(df["t"], df["team_mu_max"], label=f"{algo}: max", alpha=0.8)
+        t, (lo, med, hi) = _series(df, "team_mu_min", "team_mu_median", "team_mu_max")
+        ax.plot(t, lo, label=f"{algo}: min", alpha=0.8)
+        ax.plot(t, med, label=f"{algo}: median", alpha=0.8)
+        ax.plot(t, hi, label=f"{algo}: max", alpha=0.8)
     ax.set_title("Team mu min/median/max by period")
     ax.set_xlabel("t")
     ax.set_ylabel("mu(S)")
     ax.grid(True, alpha=0.3)
     ax.legend(ncols=2, fontsize=9)
-    fig.tight_layout()
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    fig.savefig(out_path, dpi=150)
-    plt.close(fig)
+    _save(fig, out_path)
 
 
-def plot_team_mu_quantiles(results: dict[str, pd.DataFrame], out_path: Path) -> None:
-    fig, ax = plt.subplots(figsize=(10, 5))
+def plot_team_mu_quantiles(results: Mapping[str, Columns], out_path: Path) -> None:
+    fig = _figure((10, 5))
+    ax = fig.subplots()
     for algo, df in results.items():
-        ax.plot(df["t"], df["team_mu_q10"], label=f"{algo}: q10", alpha=0.9)
-        ax.plot(df["t"], df["team_mu_q25"], label=f"{algo}: q25", alpha=0.9)
+        t, (q10, q25) = _series(df, "team_mu_q10", "team_mu_q25")
+        ax.plot(t, q10, label=f"{algo}: q10", alpha=0.9)
+        ax.plot(t, q25, label=f"{algo}: q25", alpha=0.9)
     ax.set_title("Team mu lower quantiles by period")
     ax.set_xlabel("t")
     ax.set_ylabel("mu(S)")
     ax.grid(True, alpha=0.3)
     ax.legend()
-    fig.tight_layout()
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    fig.savefig(out_path, dpi=150)
-    plt.close(fig)
+    _save(fig, out_path)
+
+
+def render_plots(
+    timeseries: Mapping[str, Columns],
+    samples: Mapping[str, Columns],
+    plots_dir: Path,
+    timer: StageTimer | None = None,
+    team_mu_hist: Mapping[str, Columns] | None = None,
+) -> None:
+    # Runs with aggregated team_mu pass their team_mu_hist tables instead of samples.
+    if timer is None:
+        timer = StageTimer()
+    with timer.stage("plot:totals_regret"):
+        plot_totals_and_regret(timeseries, plots_dir / "totals_regret.png")
+    with timer.stage("plot:team_mu_hist"):
+        if team_mu_hist:
+            edges, counts = merge_team_mu_hist(team_mu_hist)
+            plot_team_mu_hist_counts(edges, counts, plots_dir / "team_mu_hist.png")
+        else:
+            plot_team_mu_hist(samples, plots_dir / "team_mu_hist.png")
+    with timer.stage("plot:team_mu_min_median_max"):
+        plot_team_mu_time_stats(timeseries, plots_dir / "team_mu_min_median_max.png")
+    with timer.stage("plot:team_mu_quantiles"):
+        plot_team_mu_quantiles(timeseries, plots_dir / "team_mu_quantiles.png")
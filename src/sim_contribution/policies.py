@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from sim_contribution.coalitions import Coalitions
+from sim_contribution.counters import UpDownStats, new_updown_stats, update_updown
+
+
+@dataclass
+class PolicyState:
+    # What a policy has observed so far; advanced in place once per period by `observe`.
+    t: int
+    stats: UpDownStats
+    plays: np.ndarray  # (m,) int32, periods each coalition was fielded
+    outcome_sum: np.ndarray  # (m,) float, sum of the coalition's observed team outcomes
+
+
+# Per-period score over all coalitions (higher is better; ties are broken uniformly at random by
+# the greedy partitioner), or None for a uniformly random partition.
+PolicyScore = Callable[[Coalitions, PolicyState, np.random.Generator], np.ndarray | None]
+
+# The same score for R replications at once: state arrays and coalitions.mu carry a leading (R,)
+# axis and rngs[r] is replication r's generator. Returns (R, m) scores, a constant row standing in
+# for a uniformly random partition, or None when every replication is uniformly random.
+BatchPolicyScore = Callable[
+    [Coalitions, PolicyState, Sequence[np.random.Generator]], np.ndarray | None
+]
+
+
+@dataclass(frozen=True)
+class Policy:
+    name: str
+    seed_offset: int  # the policy's rng is seeded with config.seed + seed_offset
+    score: PolicyScore
+    # Optional batched `score`; without it the replication engine scores replications one by one.
+    batch_score: BatchPolicyScore | None = None
+
+
+POLICIES: dict[str, Policy] = {}
+UCB_C = 1.0
+EPSILON = 0.1
+
+
+def register_policy(policy: Policy) -> Policy:
+    if policy.name in POLICIES:
+        raise ValueError(f"policy already registered: {policy.name}")
+    if "," in policy.name:
+        raise ValueError(f"policy names cannot contain commas: {policy.name}")
+    POLICIES[policy.name] = policy
+    return policy
+
+
+def resolve_policies(names: Iterable[str]) -> dict[str, Policy]:
+    out: dict[str, Policy] = {}
+    for name in names:
+        if name not in POLICIES:
+            raise ValueError(f"unknown algorithm: {name} (choose from {', '.join(POLICIES)})")
+        if name in out:
+            raise ValueError(f"duplicate algorithm: {name}")
+        out[name] = POLICIES[name]
+    if not out:
+        raise ValueError("at least one algorithm is required")
+    return out
+
+
+def new_policy_state(coalitions: Coalitions) -> PolicyState:
+    m = int(coalitions.masks.shape[0])
+    return PolicyState(
+        t=0,
+        stats=new_updown_stats(coalitions),
+        plays=np.zeros((m,), dtype=np.int32),
+        outcome_sum=np.zeros((m,), dtype=float),
+    )
+
+
+def copy_policy_state(state: PolicyState) -> PolicyState:
+    stats = state.stats
+    return PolicyState(
+        t=state.t,
+        stats=UpDownStats(
+            up=replace(stats.up, values=stats.up.values.copy()),
+            down=replace(stats.down, values=stats.down.values.copy()),
+        ),
+        plays=state.plays.copy(),
+        outcome_sum=state.outcome_sum.copy(),
+    )
+
+
+def observe(
+    state: PolicyState,
+    coalitions: Coalitions,
+    team_idx: np.ndarray,
+    y_team: np.ndarray,
+    y_individual: np.ndarray,
+) -> None:
+    update_updown(state.stats, coalitions.members, team_idx, y_team, y_individual)
+    state.plays[team_idx] += 1
+    state.outcome_sum[team_idx] += y_team
+    state.t += 1
+
+
+def _score_ud(coalitions: Coalitions, state: PolicyState, rng: np.random.Generator) -> np.ndarray:
+    # (up, -down) packed into one int64 so a single max gives the lexicographic best.
+    return (state.stats.up.values.astype(np.int64) << 32) - state.stats.down.values.astype(np.int64)
+
+
+def _score_du(coalitions: Coalitions, state: PolicyState, rng: np.random.Generator) -> np.ndarray:
+    # Minimizing (down, -up) is maximizing (-down, up).
+    return state.stats.up.values.astype(np.int64) - (state.stats.down.values.astype(np.int64) << 32)
+
+
+def _score_random(coalitions: Coalitions, state: PolicyState, rng: np.random.Generator) -> None:
+    return None
+
+
+def _score_ucb(coalitions: Coalitions, state: PolicyState, rng: np.random.Generator) -> np.ndarray:
+    # Optimistic up-rate: up / (up + down) plus a UCB1 bonus; teams never compared are tried first.
+    # Singletons have no up/down and sit at the neutral rate 0.5.
+    up = state.stats.up.values.astype(float)
+    seen = up + state.stats.down.values
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = up / seen + UCB_C * np.sqrt(np.log(state.t + 1.0) / seen)
+    score[seen == 0] = np.inf
+    score[..., coalitions.sizes == 1] = 0.5
+    return score
+
+
+def _score_thompson(
+    coalitions: Coalitions, state: PolicyState, rng: np.random.Generator
+) -> np.ndarray:
+    # Gaussian posterior on each team's mean outcome (N(0, 1) prior, unit noise variance).
+    precision = state.plays + 1.0
+    return state.outcome_sum / precision + rng.standard_normal(precision.shape[0]) / np.sqrt(
+        precision
+    )
+
+
+def _score_eps_greedy(
+    coalitions: Coalitions, state: PolicyState, rng: np.random.Generator
+) -> np.ndarray | None:
+    # UD, except that with probability EPSILON the period's partition is uniformly random.
+    if rng.random() < EPSILON:
+        return None
+    return _score_ud(coalitions, state, rng)
+
+
+def _rng_free(score: PolicyScore) -> BatchPolicyScore:
+    # For scores that broadcast over a leading replication axis and never draw from the rng.
+    def batch_score(
+        coalitions: Coalitions, state: PolicyState, rngs: Sequence[np.random.Generator]
+    ) -> np.ndarray | None:
+        return score(coalitions, state, rngs[0])
+
+    return batch_score
+
+
+def _batch_score_thompson(
+    coalitions: Coalitions, state: PolicyState, rngs: Sequence[np.random.Generator]
+) -> np.ndarray:
+    precision = state.plays + 1.0
+    draws = np.stack([rng.standard_normal(precision.shape[-1]) for rng in rngs])
+    return state.outcome_sum / precision + draws / np.sqrt(precision)
+
+
+def _batch_score_eps_greedy(
+    coalitions: Coalitions, state: PolicyState, rngs: Sequence[np.random.Generator]
+) -> np.ndarray:
+    explore = np.array([rng.random() < EPSILON for rng in rngs])
+    score = _score_ud(coalitions, state, rngs[0])
+    score[explore] = 0
+    return score
+
+
+register_policy(
+    Policy(name="UD", seed_offset=101, score=_score_ud, batch_score=_rng_free(_score_ud))
+)
+register_policy(
+    Policy(name="DU", seed_offset=202, score=_score_du, batch_score=_rng_free(_score_du))
+)
+register_policy(
+    Policy(
+        name="Random", seed_offset=303, score=_score_random, batch_score=_rng_free(_score_random)
+    )
+)
+register_policy(
+    Policy(name="UCB", seed_offset=404, score=_score_ucb, batch_score=_rng_free(_score_ucb))
+)
+register_policy(
+    Policy(
+        name="Thompson",
+        seed_offset=505,
+        score=_score_thompson,
+        batch_score=_batch_score_thompson,
+    )
+)
+register_policy(
+    Policy(
+        name="EpsGreedy",
+        seed_offset=606,
+        score=_score_eps_greedy,
+        batch_score=_batch_score_eps_greedy,
+    )
+)
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from sim_contribution.coalitions import Coalitions
+
+
+@dataclass(frozen=True)
+class TeamRecorder:
+    team_index: np.ndarray  # (T, max_teams) int32 coalition index, -1 past team_count[t]
+    team_count: np.ndarray  # (T,) int32
+
+
+def new_team_recorder(T: int, max_teams: int) -> TeamRecorder:
+    return TeamRecorder(
+        team_index=np.full((T, max_teams), -1, dtype=np.int32),
+        team_count=np.zeros((T,), dtype=np.int32),
+    )
+
+
+def record_teams(rec: TeamRecorder, t: int, indices: Sequence[int] | np.ndarray) -> None:
+    k = len(indices)
+    rec.team_index[t, :k] = indices
+    rec.team_count[t] = k
+
+
+def _algorithm_column(algorithm: str, length: int) -> pd.Categorical:
+    return pd.Categorical.from_codes(np.zeros((length,), dtype=np.int8), categories=[algorithm])
+
+
+def period_totals(rec: TeamRecorder, mu: np.ndarray) -> np.ndarray:
+    valid = rec.team_index >= 0
+    team_mu = np.where(valid, mu[np.maximum(rec.team_index, 0)], 0.0)
+    # cumsum adds left to right, matching a running sum over the teams of each period.
+    return np.cumsum(team_mu, axis=1)[:, -1]
+
+
+def samples_frame(
+    rec: TeamRecorder, algorithm: str, coalitions: Coalitions, t_offset: int = 0
+) -> pd.DataFrame:
+    valid = rec.team_index >= 0
+    rows, _ = np.nonzero(valid)
+    idx = rec.team_index[valid]
+    return pd.DataFrame(
+        {
+            "t": rows + 1 + t_offset,
+            "algorithm": _algorithm_column(algorithm, idx.shape[0]),
+            "team_mask": coalitions.masks[idx],
+            "team_size": coalitions.sizes[idx].astype(np.int64),
+            "team_mu": coalitions.mu[idx],
+        }
+    )
+
+
+def summary_frame(
+    rec: TeamRecorder,
+    algorithm: str,
+    mu: np.ndarray,
+    totals: np.ndarray,
+    regrets: np.ndarray,
+    regrets_upper: np.ndarray | None = None,
+    t_offset: int = 0,
+) -> pd.DataFrame:
+    T = rec.team_count.shape[0]
+    stats = {name: np.empty((T,), dtype=float) for name in ("min", "median", "max", "q10", "q25")}
+
+    # Periods with the same number of teams form a dense (rows, k) block, so each statistic is one
+    # reduction along axis 1 per distinct k.
+    for k in np.unique(rec.team_count):
+        rows = np.flatnonzero(rec.team_count == k)
+        block = mu[rec.team_index[rows, :k]]
+        stats["min"][rows] = np.min(block, axis=1)
+        stats["median"][rows] = np.median(block, axis=1)
+        stats["max"][rows] = np.max(block, axis=1)
+        stats["q10"][rows] = np.quantile(block, 0.10, axis=1)
+        stats["q25"][rows] = np.quantile(block, 0.25, axis=1)
+
+    columns: dict[str, object] = {
+        "t": np.arange(t_offset + 1, t_offset + T + 1),
+        "algorithm": _algorithm_column(algorithm, T),
+        "total": totals,
+        "regret": regrets,
+    }
+    if regrets_upper is not None:
+        columns["regret_upper"] = regrets_upper
+    columns.update(
+        {
+            "team_mu_min": stats["min"],
+            "team_mu_median": stats["median"],
+            "team_mu_max": stats["max"],
+            "team_mu_q10": stats["q10"],
+            "team_mu_q25": stats["q25"],
+        }
+    )
+    return pd.DataFrame(columns)
+
+
+@dataclass
+class TeamMuHistogram:
+    # Streaming team_mu distribution of one algorithm, the bounded alternative to samples_frame.
+    # team_mu only takes the m values of coalitions.mu, so per-coalition counts are an exact sketch
+    # that merges by addition; each window of `window` periods is written as those counts and as a
+    # fixed-bin histogram over `edges`, which depend only on coalitions.mu.
+    edges: np.ndarray  # (bins + 1,)
+    window: int | None  # periods per window; None keeps a single window over the whole run
+    counts: np.ndarray  # (m,) int64, times each coalition was fielded in the open window
+    t_start: int  # periods before the open window
+    t: int  # periods added so far
+
+
+def new_team_mu_histogram(coalitions: Coalitions, bins: int, window: int | None) -> TeamMuHistogram:
+    mu = coalitions.mu
+    return TeamMuHistogram(
+        edges=np.histogram_bin_edges(np.array([mu.min(), mu.max()]), bins=bins),
+        window=window,
+        counts=np.zeros(mu.shape, dtype=np.int64),
+        t_start=0,
+        t=0,
+    )
+
+
+def _window_frames(
+    hist: TeamMuHistogram, algorithm: str, coalitions: Coalitions
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # The open window as (histogram rows, nonzero coalition count rows); resets it.
+    bins = hist.edges.shape[0] - 1
+    # Bins are half-open except the last, like np.histogram.
+    bin_of = np.clip(np.searchsorted(hist.edges, coalitions.mu, side="right") - 1, 0, bins - 1)
+    binned = np.bincount(bin_of, weights=hist.counts, minlength=bins).astype(np.int64)
+    idx = np.flatnonzero(hist.counts)
+    t_first, t_last = hist.t_start + 1, hist.t
+
+    def window_columns(length: int) -> dict[str, object]:
+        return {
+            "t_first": np.full((length,), t_first, dtype=np.int64),
+            "t_last": np.full((length,), t_last, dtype=np.int64),
+            "algorithm": _algorithm_column(algorithm, length),
+        }
+
+    hist_frame = pd.DataFrame(
+        {
+            **window_columns(bins),
+            "bin_lo": hist.edges[:-1],
+            "bin_hi": hist.edges[1:],
+            "count": binned,
+        }
+    )
+    counts_frame = pd.DataFrame(
+        {
+            **window_columns(idx.shape[0]),
+            "team_mask": coalitions.masks[idx],
+            "team_size": coalitions.sizes[idx].astype(np.int64),
+            "team_mu": coalitions.mu[idx],
+            "count": hist.counts[idx],
+        }
+    )
+    hist.counts.fill(0)
+    hist.t_start = hist.t
+    return hist_frame, counts_frame
+
+
+def add_team_mu(
+    hist: TeamMuHistogram,
+    rec: TeamRecorder,
+    algorithm: str,
+    coalitions: Coalitions,
+    final: bool = False,
+) -> list[tuple[pd.DataFrame, pd.DataFrame]]:
+    # Adds every period of `rec` and returns the (histogram, counts) rows of each window that
+    # closed; with final=True the last, possibly partial, window is closed too.
+    m = hist.counts.shape[0]
+    closed: list[tuple[pd.DataFrame, pd.DataFrame]] = []
+    T = rec.team_count.shape[0]
+    row = 0
+    while row < T:
+        stop = T if hist.window is None else min(T, row + hist.window - (hist.t - hist.t_start))
+        idx = rec.team_index[row:stop]
+        hist.counts += np.bincount(idx[idx >= 0], minlength=m)
+        hist.t += stop - row
+        row = stop
+        if hist.window is not None and hist.t - hist.t_start == hist.window:
+            closed.append(_window_frames(hist, algorithm, coalitions))
+    if final and hist.t > hist.t_start:
+        closed.append(_window_frames(hist, algorithm, coalitions))
+    return closed
+
+
+def team_mu_quantiles(
+    team_mu: np.ndarray, count: np.ndarray, q: float | np.ndarray
+) -> float | np.ndarray:
+    # np.quantile (linear method) of the samples that `count` times each `team_mu` would give,
+    # without expanding them; rows of several windows or runs can simply be concatenated.
+    team_mu = np.asarray(team_mu, dtype=float)
+    order = np.argsort(team_mu, kind="stable")
+    values = team_mu[order]
+    cum = np.cumsum(np.asarray(count, dtype=np.int64)[order])
+    total = int(cum[-1]) if cum.shape[0] > 0 else 0
+    if total == 0:
+        raise ValueError("team_mu_quantiles needs at least one sample")
+    pos = np.asarray(q, dtype=float) * (total - 1)
+    lo = np.floor(pos)
+    hi = np.minimum(lo + 1, total - 1)
+    a = values[np.searchsorted(cum, lo, side="right")]
+    b = values[np.searchsorted(cum, hi, side="right")]
+    # Same interpolation as numpy's _lerp, so the result matches np.quantile bit for bit.
+    frac = pos - lo
+    out = np.where(frac >= 0.5, b - (b - a) * (1 - frac), a + (b - a) * frac)
+    return float(out) if out.ndim == 0 else out
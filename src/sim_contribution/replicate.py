@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from sim_contribution.batched import run_replication_batch
+from sim_contribution.defaults import DEFAULT_REPLICATION_BATCH
+from sim_contribution.oracle_cache import OracleCache
+from sim_contribution.simulate import SimulationConfig, run_simulation
+
+# Two-sided 95% normal quantile for the mean CI.
+CI_Z = 1.959963984540054
+
+
+@dataclass
+class _RunningMoments:
+    # Welford accumulator over replications, one slot per period.
+    count: int
+    mean: np.ndarray  # (T,)
+    m2: np.ndarray  # (T,)
+
+    def add(self, x: np.ndarray) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def std(self) -> np.ndarray:
+        if self.count < 2:
+            return np.full_like(self.mean, np.nan)
+        return np.sqrt(self.m2 / (self.count - 1))
+
+
+@dataclass(frozen=True)
+class ReplicationSummary:
+    config: SimulationConfig
+    seeds: list[int]
+    summary: pd.DataFrame  # one row per (algorithm, t) with mean/std/CI of total and regret
+
+
+def _replicate_one(
+    config: SimulationConfig, oracle_cache: OracleCache | None = None
+) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    bundle = run_simulation(config, oracle_cache=oracle_cache)
+    return {algo: (res.totals, res.regrets) for algo, res in bundle.results.items()}
+
+
+def _replicate_batch(
+    config: SimulationConfig, seeds: list[int], oracle_cache: OracleCache | None = None
+) -> list[dict[str, tuple[np.ndarray, np.ndarray]]]:
+    batch = run_replication_batch(config, seeds, oracle_cache=oracle_cache)
+    return [
+        {algo: (batch.totals[algo][r], batch.regrets[algo][r]) for algo in batch.totals}
+        for r in range(len(seeds))
+    ]
+
+
+def _iter_replications(
+    config: SimulationConfig,
+    seeds: list[int],
+    workers: int,
+    oracle_cache: OracleCache | None,
+    batch_size: int,
+) -> Iterator[dict[str, tuple[np.ndarray, np.ndarray]]]:
+    if batch_size <= 1:
+        configs = [replace(config, seed=s) for s in seeds]
+        if workers <= 1 or len(configs) <= 1:
+            for cfg in configs:
+                yield _replicate_one(cfg, oracle_cache)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # `map` yields in seed order, so the aggregate does not depend on scheduling.
+            yield from pool.map(partial(_replicate_one, oracle_cache=oracle_cache), configs)
+        return
+
+    # Groups of `batch_size` seeds run through the batched engine, which reproduces each seed's
+    # run_simulation results exactly. Groups shrink so that every worker gets at least one.
+    if workers > 1:
+        batch_size = min(batch_size, math.ceil(len(seeds) / workers))
+    groups = [seeds[lo : lo + batch_size] for lo in range(0, len(seeds), batch_size)]
+    run = partial(_replicate_batch, config, oracle_cache=oracle_cache)
+    if workers <= 1 or len(groups) <= 1:
+        for group in groups:
+            yield from run(group)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for results in pool.map(run, groups):
+            yield from results
+
+
+def run_replications(
+    config: SimulationConfig,
+    seeds: Iterable[int],
+    workers: int = 1,
+    oracle_cache: OracleCache | None = None,
+    batch_size: int = DEFAULT_REPLICATION_BATCH,
+) -> ReplicationSummary:
+    seed_list = [int(s) for s in seeds]
+    if not seed_list:
+        raise ValueError("seeds must be non-empty")
+    if workers <= 0:
+        raise ValueError("workers must be positive")
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+
+    moments: dict[str, dict[str, _RunningMoments]] = {}
+
+    for result in _iter_replications(config, seed_list, workers, oracle_cache, batch_size):
+        for algo, (totals, regrets) in result.items():
+            if algo not in moments:
+                moments[algo] = {
+                    name: _RunningMoments(
+                        count=0, mean=np.zeros((config.T,)), m2=np.zeros((config.T,))
+                    )
+                    for name in ("total", "regret")
+                }
+            moments[algo]["total"].add(totals)
+            moments[algo]["regret"].add(regrets)
+
+    t = np.arange(1, config.T + 1)
+    frames: list[pd.DataFrame] = []
+    for algo, by_metric in moments.items():
+        columns: dict[str, object] = {"t": t, "algorithm": algo}
+        for name, acc in by_metric.items():
+            std = acc.std()
+            half = CI_Z * std / np.sqrt(acc.count)
+            columns[f"{name}_mean"] = acc.mean
+            columns[f"{name}_std"] = std
+            columns[f"{name}_ci_low"] = acc.mean - half
+            columns[f"{name}_ci_high"] = acc.mean + half
+        columns["replications"] = by_metric["total"].count
+        frames.append(pd.DataFrame(columns))
+
+    return ReplicationSummary(
+        config=config,
+        seeds=seed_list,
+        summary=pd.concat(frames, ignore_index=True),
+    )
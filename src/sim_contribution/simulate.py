@@ -1,16 +1,52 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+import time
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
-from sim_contribution.algorithms import greedy_partition_du, greedy_partition_random, greedy_partition_ud
-from sim_contribution.bitmask import iter_bits
+from sim_contribution.algorithms import GreedyEngine, build_greedy_engine, greedy_engine_max
 from sim_contribution.coalitions import Coalitions, precompute_coalitions
+from sim_contribution.defaults import DEFAULT_POLICIES, ORACLE_MODES
+from sim_contribution.instrument import StageTimer, write_timings
 from sim_contribution.model import ModelConfig, PlayerParams, generate_players
-from sim_contribution.oracle import compute_oracle_value
+from sim_contribution.noise import iter_noise_rows, precompute_eps
+from sim_contribution.oracle import OracleResult, compute_oracle_value
+from sim_contribution.oracle_approx import approximate_oracle
+from sim_contribution.oracle_cache import OracleCache, oracle_key
+from sim_contribution.policies import (
+    Policy,
+    PolicyState,
+    copy_policy_state,
+    new_policy_state,
+    observe,
+    resolve_policies,
+)
+from sim_contribution.recorder import (
+    TeamRecorder,
+    add_team_mu,
+    new_team_mu_histogram,
+    new_team_recorder,
+    period_totals,
+    record_teams,
+    samples_frame,
+    summary_frame,
+)
+from sim_contribution.storage import (
+    OUTPUT_FORMATS,
+    Table,
+    frame_to_table,
+    read_table,
+    table_path,
+    write_table,
+)
+
+MAX_EXACT_ORACLE_PLAYERS = 24
+EPS_SEED_OFFSET = 10_000_019
 
 
 @dataclass(frozen=True)
@@ -20,6 +56,12 @@ class SimulationConfig:
     d: int
     seed: int
     noise_sigma: float = 1.0
+    oracle: str = "exact"
+    algorithms: tuple[str, ...] = DEFAULT_POLICIES
+    # team_mu_bins set: write team_mu histograms/counts per window of team_mu_window periods (None:
+    # the whole run) instead of one team_mu_samples row per fielded team.
+    team_mu_bins: int | None = None
+    team_mu_window: int | None = None
 
 
 @dataclass(frozen=True)
@@ -27,165 +69,319 @@ class AlgorithmResult:
     algorithm: str
     totals: np.ndarray  # (T,)
     regrets: np.ndarray  # (T,)
-    team_mu_samples: pd.DataFrame
+    regrets_upper: np.ndarray | None  # (T,) upper bound on regret when the oracle is approximate
+    team_mu_samples: pd.DataFrame | None  # None when team_mu is aggregated
     summary: pd.DataFrame
+    team_mu_hist: pd.DataFrame | None = None
+    team_mu_counts: pd.DataFrame | None = None
 
 
-def _precompute_eps(
-    T: int,
-    coalition_masks: np.ndarray,
-    sigma: float,
-    seed: int,
-) -> np.ndarray:
-    rng = np.random.default_rng(seed)
-    eps = rng.normal(loc=0.0, scale=sigma, size=(T, len(coalition_masks))).astype(float)
-    return eps
-
-
-def _run_one(
-    *,
+def _algorithm_result(
     algorithm: str,
-    n: int,
-    T: int,
+    recorder: TeamRecorder,
     coalitions: Coalitions,
-    eps: np.ndarray,
-    rng: np.random.Generator,
     oracle_value: float,
+    oracle_upper_bound: float | None,
+    team_mu_bins: int | None = None,
+    team_mu_window: int | None = None,
 ) -> AlgorithmResult:
-    up = np.zeros((1 << n,), dtype=np.int64)
-    down = np.zeros((1 << n,), dtype=np.int64)
-
-    totals = np.zeros((T,), dtype=float)
-    regrets = np.zeros((T,), dtype=float)
-
-    sample_rows: list[dict[str, object]] = []
-    summary_rows: list[dict[str, object]] = []
-
-    for t in range(T):
-        if algorithm == "UD":
-            partition = greedy_partition_ud(n, up, down, rng).partition
-        elif algorithm == "DU":
-            partition = greedy_partition_du(n, up, down, rng).partition
-        elif algorithm == "Random":
-            partition = greedy_partition_random(n, rng).partition
-        else:
-            raise ValueError(f"unknown algorithm: {algorithm}")
-
-        y_individual = np.zeros((n,), dtype=float)
-        for i in range(n):
-            m = 1 << i
-            idx = coalitions.mask_to_index[m]
-            y_individual[i] = coalitions.mu[idx] + eps[t, idx]
-
-        team_mus: list[float] = []
-
-        for team_mask in partition:
-            team_idx = coalitions.mask_to_index[int(team_mask)]
-            y_team = float(coalitions.mu[team_idx] + eps[t, team_idx])
-            team_mu = float(coalitions.mu[team_idx])
-            team_mus.append(team_mu)
-
-            members = list(iter_bits(int(team_mask)))
-            if len(members) >= 2:
-                for k in members:
-                    if y_team > y_individual[k]:
-                        up[int(team_mask)] += 1
-                    elif y_individual[k] > y_team:
-                        down[int(team_mask)] += 1
-
-            sample_rows.append(
-                {
-                    "t": t + 1,
-                    "algorithm": algorithm,
-                    "team_mask": int(team_mask),
-                    "team_size": len(members),
-                    "team_mu": team_mu,
-                }
-            )
-
-        total_t = float(sum(team_mus))
-        totals[t] = total_t
-        regrets[t] = float(oracle_value - total_t)
-
-        team_mus_arr = np.array(team_mus, dtype=float)
-        summary_rows.append(
-            {
-                "t": t + 1,
-                "algorithm": algorithm,
-                "total": total_t,
-                "regret": regrets[t],
-                "team_mu_min": float(np.min(team_mus_arr)),
-                "team_mu_median": float(np.median(team_mus_arr)),
-                "team_mu_max": float(np.max(team_mus_arr)),
-                "team_mu_q10": float(np.quantile(team_mus_arr, 0.10)),
-                "team_mu_q25": float(np.quantile(team_mus_arr, 0.25)),
-            }
+    totals = period_totals(recorder, coalitions.mu)
+    regrets = oracle_value - totals
+    regrets_upper = oracle_upper_bound - totals if oracle_upper_bound is not None else None
+    summary = summary_frame(recorder, algorithm, coalitions.mu, totals, regrets, regrets_upper)
+
+    if team_mu_bins is None:
+        return AlgorithmResult(
+            algorithm=algorithm,
+            totals=totals,
+            regrets=regrets,
+            regrets_upper=regrets_upper,
+            team_mu_samples=samples_frame(recorder, algorithm, coalitions),
+            summary=summary,
         )
-
+    hist = new_team_mu_histogram(coalitions, team_mu_bins, team_mu_window)
+    windows = add_team_mu(hist, recorder, algorithm, coalitions, final=True)
     return AlgorithmResult(
         algorithm=algorithm,
         totals=totals,
         regrets=regrets,
-        team_mu_samples=pd.DataFrame(sample_rows),
-        summary=pd.DataFrame(summary_rows),
+        regrets_upper=regrets_upper,
+        team_mu_samples=None,
+        summary=summary,
+        team_mu_hist=pd.concat([h for h, _ in windows], ignore_index=True),
+        team_mu_counts=pd.concat([c for _, c in windows], ignore_index=True),
     )
 
 
+def step_period(
+    policies: Mapping[str, Policy],
+    states: Mapping[str, PolicyState],
+    rngs: Mapping[str, np.random.Generator],
+    engine: GreedyEngine,
+    coalitions: Coalitions,
+    n: int,
+    eps_t: np.ndarray,
+    timer: StageTimer | None = None,
+) -> dict[str, np.ndarray]:
+    # One period for every algorithm over the shared noise row; returns each one's team indices.
+    mu = coalitions.mu
+    # Singletons occupy coalition indices 0..n-1.
+    y_individual = mu[:n] + eps_t[:n]
+
+    teams: dict[str, np.ndarray] = {}
+    for algo, policy in policies.items():
+        start = time.perf_counter()
+        rng = rngs[algo]
+        greedy = greedy_engine_max(engine, policy.score(coalitions, states[algo], rng), rng)
+        assert greedy.indices is not None
+        team_idx = np.asarray(greedy.indices, dtype=np.int64)
+        observe(states[algo], coalitions, team_idx, mu[team_idx] + eps_t[team_idx], y_individual)
+        teams[algo] = team_idx
+        if timer is not None:
+            timer.add(f"algorithm:{algo}", time.perf_counter() - start)
+    return teams
+
+
+def initial_policy_state(coalitions: Coalitions, initial: PolicyState | None) -> PolicyState:
+    # Every algorithm gets its own copy of a warm-start state (e.g. from ingest.ingest_log).
+    if initial is None:
+        return new_policy_state(coalitions)
+    if initial.plays.shape != (int(coalitions.masks.shape[0]),):
+        raise ValueError("initial policy state was built for a different number of players")
+    return copy_policy_state(initial)
+
+
+def _run_lockstep(
+    *,
+    policies: Mapping[str, Policy],
+    rngs: Mapping[str, np.random.Generator],
+    n: int,
+    T: int,
+    coalitions: Coalitions,
+    engine: GreedyEngine,
+    noise_rows: Iterable[np.ndarray],
+    oracle_value: float,
+    oracle_upper_bound: float | None = None,
+    initial_state: PolicyState | None = None,
+    team_mu_bins: int | None = None,
+    team_mu_window: int | None = None,
+    timer: StageTimer,
+) -> dict[str, AlgorithmResult]:
+    # All algorithms advance together over one pass of the noise stream. Each keeps its own rng,
+    # observations and recorder, so the results equal running them one after another.
+    states = {algo: initial_policy_state(coalitions, initial_state) for algo in policies}
+    recorders = {algo: new_team_recorder(T, n) for algo in policies}
+
+    rows = iter(noise_rows)
+    for t in range(T):
+        start = time.perf_counter()
+        eps_t = next(rows)
+        timer.add("noise", time.perf_counter() - start)
+        teams = step_period(policies, states, rngs, engine, coalitions, n, eps_t, timer)
+        for algo, team_idx in teams.items():
+            record_teams(recorders[algo], t, team_idx)
+
+    results: dict[str, AlgorithmResult] = {}
+    for algo in policies:
+        with timer.stage("summaries"):
+            results[algo] = _algorithm_result(
+                algo,
+                recorders[algo],
+                coalitions,
+                oracle_value,
+                oracle_upper_bound,
+                team_mu_bins,
+                team_mu_window,
+            )
+    return results
+
+
 @dataclass(frozen=True)
 class SimulationBundle:
     config: SimulationConfig
     players: PlayerParams
     coalitions: Coalitions
     oracle_value: float
-    eps: np.ndarray
+    oracle_upper_bound: float | None
+    eps_seed: int
+    eps: np.ndarray | None  # (T, m); only kept when requested, otherwise regenerate from eps_seed
     results: dict[str, AlgorithmResult]
+    timings: StageTimer = field(default_factory=StageTimer)
+
+
+@dataclass(frozen=True)
+class ModelArtifacts:
+    # Everything that depends only on (n, d, seed) and the oracle mode, shared across T/noise_sigma.
+    players: PlayerParams
+    coalitions: Coalitions
+    oracle_value: float  # exact optimum, or the approximate oracle's lower bound
+    oracle_upper_bound: float | None = None  # only for oracle="approx"
 
 
-def run_simulation(config: SimulationConfig) -> SimulationBundle:
+def _validate_config(config: SimulationConfig) -> None:
     if config.n <= 0:
         raise ValueError("n must be positive")
     if config.T <= 0:
         raise ValueError("T must be positive")
     if config.d <= 0:
         raise ValueError("d must be positive")
-    if config.n > 24:
-        raise ValueError("n is too large for the oracle DP and up/down arrays; choose n<=24")
+    resolve_policies(config.algorithms)
+    if config.team_mu_bins is not None and config.team_mu_bins <= 0:
+        raise ValueError("team_mu_bins must be positive")
+    if config.team_mu_window is not None:
+        if config.team_mu_bins is None:
+            raise ValueError("team_mu_window needs team_mu_bins")
+        if config.team_mu_window <= 0:
+            raise ValueError("team_mu_window must be positive")
+    if config.oracle not in ORACLE_MODES:
+        raise ValueError(
+            f"unknown oracle mode: {config.oracle} (choose from {', '.join(ORACLE_MODES)})"
+        )
+    if config.oracle == "exact" and config.n > MAX_EXACT_ORACLE_PLAYERS:
+        raise ValueError(
+            f"n is too large for the oracle DP; choose n<={MAX_EXACT_ORACLE_PLAYERS} "
+            "or oracle='approx'/'none'"
+        )
 
-    model_cfg = ModelConfig(n=config.n, d=config.d, seed=config.seed, noise_sigma=config.noise_sigma)
-    players = generate_players(model_cfg)
-    coalitions = precompute_coalitions(players)
 
-    oracle_value = compute_oracle_value(config.n, coalitions, reconstruct=False).value
+def _compute_oracle(
+    config: SimulationConfig,
+    players: PlayerParams,
+    coalitions: Coalitions,
+    oracle_cache: OracleCache | None,
+    oracle_workers: int = 1,
+) -> OracleResult:
+    key = oracle_key(players, coalitions.mu, config.oracle) if oracle_cache is not None else ""
+    if oracle_cache is not None:
+        cached = oracle_cache.get(key)
+        if cached is not None:
+            return cached
+
+    if config.oracle == "exact":
+        result = compute_oracle_value(
+            config.n, coalitions, reconstruct=False, workers=oracle_workers
+        )
+    else:
+        result = approximate_oracle(config.n, coalitions)
 
-    eps_seed = config.seed + 10_000_019
-    eps = _precompute_eps(config.T, coalitions.masks, config.noise_sigma, eps_seed)
+    if oracle_cache is not None:
+        oracle_cache.put(key, result)
+    return result
 
-    algos = ["UD", "DU", "Random"]
-    results: dict[str, AlgorithmResult] = {}
-    for algo in algos:
-        algo_seed = config.seed + {"UD": 101, "DU": 202, "Random": 303}[algo]
-        rng = np.random.default_rng(algo_seed)
-        results[algo] = _run_one(
-            algorithm=algo,
-            n=config.n,
-            T=config.T,
-            coalitions=coalitions,
-            eps=eps,
-            rng=rng,
-            oracle_value=oracle_value,
-        )
+
+def prepare_artifacts(
+    config: SimulationConfig,
+    oracle_cache: OracleCache | None = None,
+    timer: StageTimer | None = None,
+    oracle_workers: int = 1,
+) -> ModelArtifacts:
+    _validate_config(config)
+    if timer is None:
+        timer = StageTimer()
+
+    model_cfg = ModelConfig(n=config.n, d=config.d, seed=config.seed, noise_sigma=config.noise_sigma)
+    with timer.stage("players"):
+        players = generate_players(model_cfg)
+    with timer.stage("coalitions"):
+        coalitions = precompute_coalitions(players)
+
+    oracle_upper_bound: float | None = None
+    if config.oracle == "none":
+        oracle_value = float("nan")
+    else:
+        with timer.stage("oracle"):
+            result = _compute_oracle(config, players, coalitions, oracle_cache, oracle_workers)
+        oracle_value = result.value
+        if config.oracle == "approx":
+            oracle_upper_bound = result.upper_bound
+
+    return ModelArtifacts(
+        players=players,
+        coalitions=coalitions,
+        oracle_value=float(oracle_value),
+        oracle_upper_bound=oracle_upper_bound,
+    )
+
+
+def run_simulation(
+    config: SimulationConfig,
+    artifacts: ModelArtifacts | None = None,
+    keep_eps: bool = False,
+    oracle_cache: OracleCache | None = None,
+    timer: StageTimer | None = None,
+    oracle_workers: int = 1,
+    initial_state: PolicyState | None = None,
+) -> SimulationBundle:
+    if timer is None:
+        timer = StageTimer()
+    if artifacts is None:
+        artifacts = prepare_artifacts(config, oracle_cache, timer, oracle_workers)
+    else:
+        _validate_config(config)
+        if (
+            int(artifacts.players.a.shape[0]) != config.n
+            or int(artifacts.players.skills.shape[1]) != config.d
+        ):
+            raise ValueError("artifacts were prepared for a different (n, d)")
+    players = artifacts.players
+    coalitions = artifacts.coalitions
+    oracle_value = artifacts.oracle_value
+
+    m = int(coalitions.masks.shape[0])
+    eps_seed = config.seed + EPS_SEED_OFFSET
+    eps: np.ndarray | None = None
+    if keep_eps:
+        with timer.stage("eps"):
+            eps = precompute_eps(config.T, m, config.noise_sigma, eps_seed)
+
+    with timer.stage("engine"):
+        engine = build_greedy_engine(coalitions)
+
+    policies = resolve_policies(config.algorithms)
+    rngs = {
+        algo: np.random.default_rng(config.seed + p.seed_offset) for algo, p in policies.items()
+    }
+    noise_rows = (
+        eps if eps is not None else iter_noise_rows(config.T, m, config.noise_sigma, eps_seed)
+    )
+    results = _run_lockstep(
+        policies=policies,
+        rngs=rngs,
+        n=config.n,
+        T=config.T,
+        coalitions=coalitions,
+        engine=engine,
+        noise_rows=noise_rows,
+        oracle_value=oracle_value,
+        oracle_upper_bound=artifacts.oracle_upper_bound,
+        initial_state=initial_state,
+        team_mu_bins=config.team_mu_bins,
+        team_mu_window=config.team_mu_window,
+        timer=timer,
+    )
 
     return SimulationBundle(
         config=config,
         players=players,
         coalitions=coalitions,
         oracle_value=float(oracle_value),
+        oracle_upper_bound=artifacts.oracle_upper_bound,
+        eps_seed=eps_seed,
         eps=eps,
         results=results,
+        timings=timer,
     )
 
 
-def save_bundle(bundle: SimulationBundle, out_dir: Path) -> None:
+def save_bundle(bundle: SimulationBundle, out_dir: Path, fmt: str = "csv") -> None:
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"unknown output format: {fmt} (choose from {', '.join(OUTPUT_FORMATS)})")
+    with bundle.timings.stage("save"):
+        _write_bundle(bundle, out_dir, fmt)
+    write_timings(bundle.timings, out_dir / "timings.json")
+
+
+def _write_bundle(bundle: SimulationBundle, out_dir: Path, fmt: str) -> None:
     out_dir.mkdir(parents=True, exist_ok=True)
     (out_dir / "data").mkdir(parents=True, exist_ok=True)
     (out_dir / "plots").mkdir(parents=True, exist_ok=True)
@@ -198,13 +394,23 @@ def save_bundle(bundle: SimulationBundle, out_dir: Path) -> None:
             f'  "T": {cfg.T},\n'
             f'  "d": {cfg.d},\n'
             f'  "seed": {cfg.seed},\n'
-            f'  "noise_sigma": {cfg.noise_sigma}\n'
+            f'  "noise_sigma": {cfg.noise_sigma},\n'
+            f'  "oracle": "{cfg.oracle}",\n'
+            f'  "algorithms": {json.dumps(list(cfg.algorithms))},\n'
+            f'  "team_mu_bins": {json.dumps(cfg.team_mu_bins)},\n'
+            f'  "team_mu_window": {json.dumps(cfg.team_mu_window)},\n'
+            f'  "eps_seed": {bundle.eps_seed},\n'
+            f'  "output_format": "{fmt}"\n'
             "}\n"
         ),
         encoding="utf-8",
     )
 
     (out_dir / "oracle_value.txt").write_text(f"{bundle.oracle_value}\n", encoding="utf-8")
+    if bundle.oracle_upper_bound is not None:
+        (out_dir / "oracle_upper_bound.txt").write_text(
+            f"{bundle.oracle_upper_bound}\n", encoding="utf-8"
+        )
 
     players = bundle.players
     np.savez_compressed(
@@ -214,29 +420,77 @@ def save_bundle(bundle: SimulationBundle, out_dir: Path) -> None:
         skills=players.skills,
         b=players.b,
     )
-    np.savez_compressed(out_dir / "data" / "eps.npz", eps=bundle.eps)
-
-    coal_rows: list[dict[str, object]] = []
-    for mask, size, mem, mu, comp, cost in zip(
-        bundle.coalitions.masks,
-        bundle.coalitions.sizes,
-        bundle.coalitions.members,
-        bundle.coalitions.mu,
-        bundle.coalitions.comp,
-        bundle.coalitions.cost,
-    ):
-        coal_rows.append(
-            {
-                "mask": int(mask),
-                "size": int(size),
-                "members": ",".join(map(str, mem)),
-                "mu": float(mu),
-                "comp": float(comp),
-                "cost": float(cost),
-            }
-        )
-    pd.DataFrame(coal_rows).to_csv(out_dir / "data" / "coalitions.csv", index=False)
+    if bundle.eps is not None:
+        np.savez_compressed(out_dir / "data" / "eps.npz", eps=bundle.eps)
+
+    coalitions = bundle.coalitions
+    coalition_table: Table = {
+        "mask": coalitions.masks,
+        "size": coalitions.sizes,
+        "members": coalitions.members,
+        "mu": coalitions.mu,
+        "comp": coalitions.comp,
+        "cost": coalitions.cost,
+    }
+    write_table(coalition_table, out_dir / "data" / "coalitions", fmt)
 
     for algo, res in bundle.results.items():
-        res.summary.to_csv(out_dir / "data" / f"timeseries_{algo}.csv", index=False)
-        res.team_mu_samples.to_csv(out_dir / "data" / f"team_mu_samples_{algo}.csv", index=False)
+        write_table(frame_to_table(res.summary), out_dir / "data" / f"timeseries_{algo}", fmt)
+        for kind, frame in (
+            ("team_mu_samples", res.team_mu_samples),
+            ("team_mu_hist", res.team_mu_hist),
+            ("team_mu_counts", res.team_mu_counts),
+        ):
+            if frame is not None:
+                write_table(frame_to_table(frame), out_dir / "data" / f"{kind}_{algo}", fmt)
+
+
+@dataclass(frozen=True)
+class LoadedBundle:
+    config: dict[str, object]
+    oracle_value: float
+    oracle_upper_bound: float | None
+    players: PlayerParams
+    coalitions: Table
+    timeseries: dict[str, Table]
+    # Only the team_mu tables the run wrote: samples by default, hist/counts with team_mu_bins.
+    team_mu_samples: dict[str, Table]
+    team_mu_hist: dict[str, Table] = field(default_factory=dict)
+    team_mu_counts: dict[str, Table] = field(default_factory=dict)
+
+
+def load_bundle(out_dir: Path, mmap: bool = True, read_samples: bool = True) -> LoadedBundle:
+    # read_samples=False leaves team_mu_samples empty, for callers that stream those files.
+    config: dict[str, object] = json.loads((out_dir / "config.json").read_text(encoding="utf-8"))
+    fmt = str(config.get("output_format", "csv"))
+    data = out_dir / "data"
+
+    with np.load(data / "players.npz") as z:
+        players = PlayerParams(a=z["a"], c=z["c"], skills=z["skills"], b=z["b"])
+
+    upper_path = out_dir / "oracle_upper_bound.txt"
+    oracle_upper_bound = (
+        float(upper_path.read_text(encoding="utf-8")) if upper_path.exists() else None
+    )
+
+    prefix = "timeseries_"
+    algos = sorted({p.name[len(prefix) :].split(".")[0] for p in data.glob(f"{prefix}*")})
+
+    def tables(kind: str) -> dict[str, Table]:
+        return {
+            a: read_table(data / f"{kind}_{a}", fmt, mmap=mmap)
+            for a in algos
+            if table_path(data / f"{kind}_{a}", fmt).exists()
+        }
+
+    return LoadedBundle(
+        config=config,
+        oracle_value=float((out_dir / "oracle_value.txt").read_text(encoding="utf-8")),
+        oracle_upper_bound=oracle_upper_bound,
+        players=players,
+        coalitions=read_table(data / "coalitions", fmt, mmap=mmap, matrix_columns=("members",)),
+        timeseries={a: read_table(data / f"timeseries_{a}", fmt, mmap=mmap) for a in algos},
+        team_mu_samples=tables("team_mu_samples") if read_samples else {},
+        team_mu_hist=tables("team_mu_hist"),
+        team_mu_counts=tables("team_mu_counts"),
+    )
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sim_contribution.bitmask import mask_words, masks_from_words
+from sim_contribution.defaults import OUTPUT_FORMATS
+
+# Text label columns; in npy layout they are implied by the table name and not stored.
+LABEL_COLUMNS = ("algorithm",)
+# Object columns (Python-int masks for n > 63) are stored as uint64 words (see
+# bitmask.mask_words): `<name>.words.npy` in npy layout, `<name>.words_0`, `_1`, ... in parquet.
+_WORDS_SUFFIX = ".words"
+
+# Column name -> array. 2-D columns (e.g. the (m, 3) coalition member array) are stored as-is in
+# npy and split into `<name>_0`, `<name>_1`, ... in row formats.
+Table = dict[str, np.ndarray]
+
+
+def table_path(stem: Path, fmt: str) -> Path:
+    if fmt == "csv":
+        return stem.with_suffix(".csv")
+    if fmt == "parquet":
+        return stem.with_suffix(".parquet")
+    if fmt == "npy":
+        return stem
+    raise ValueError(f"unknown output format: {fmt} (choose from {', '.join(OUTPUT_FORMATS)})")
+
+
+def frame_to_table(df: pd.DataFrame) -> Table:
+    return {str(c): df[c].to_numpy() for c in df.columns}
+
+
+def _flatten(table: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+    flat: dict[str, np.ndarray] = {}
+    for name, col in table.items():
+        if col.ndim == 2:
+            for j in range(col.shape[1]):
+                flat[f"{name}_{j}"] = col[:, j]
+        else:
+            flat[name] = col
+    return flat
+
+
+def _unflatten(flat: Mapping[str, np.ndarray], matrix_columns: tuple[str, ...]) -> Table:
+    table: Table = {}
+    for name, col in flat.items():
+        base, _, suffix = name.rpartition("_")
+        if base in matrix_columns and suffix.isdigit():
+            continue
+        table[name] = col
+    for name in matrix_columns:
+        parts: list[np.ndarray] = []
+        while f"{name}_{len(parts)}" in flat:
+            parts.append(flat[f"{name}_{len(parts)}"])
+        if parts:
+            table[name] = np.column_stack(parts)
+    return table
+
+
+def _is_mask_column(name: str, col: np.ndarray) -> bool:
+    return col.dtype == object and name not in LABEL_COLUMNS
+
+
+def _encode_words(table: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+    out: dict[str, np.ndarray] = {}
+    for name, col in table.items():
+        if _is_mask_column(name, col):
+            out[f"{name}{_WORDS_SUFFIX}"] = mask_words(col)
+        else:
+            out[name] = col
+    return out
+
+
+def _decode_words(flat: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+    # Inverse of _encode_words after _flatten: `<name>.words_<j>` columns back to Python ints.
+    words: dict[str, list[np.ndarray]] = {}
+    out: dict[str, np.ndarray] = {}
+    for name, col in flat.items():
+        base, _, suffix = name.rpartition("_")
+        if base.endswith(_WORDS_SUFFIX) and suffix.isdigit():
+            key = base.removesuffix(_WORDS_SUFFIX)
+            words.setdefault(key, []).append(col)
+            out.setdefault(key, col)  # holds the column's position until it is decoded below
+        else:
+            out[name] = col
+    for name, parts in words.items():
+        out[name] = masks_from_words(np.column_stack(parts))
+    return out
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError(
+            "parquet requires pyarrow; install the parquet extra or use the csv/npy format"
+        ) from e
+    return pa, pq
+
+
+def write_table(table: Mapping[str, np.ndarray], stem: Path, fmt: str) -> Path:
+    path = table_path(stem, fmt)
+    if fmt == "csv":
+        pd.DataFrame(_flatten(table)).to_csv(path, index=False)
+    elif fmt == "parquet":
+        pa, pq = _import_pyarrow()
+        flat = _flatten(_encode_words(table))
+        pq.write_table(pa.table({name: pa.array(col) for name, col in flat.items()}), path)
+    else:
+        path.mkdir(parents=True, exist_ok=True)
+        for name, col in table.items():
+            if name in LABEL_COLUMNS:
+                continue
+            if _is_mask_column(name, col):
+                np.save(path / f"{name}{_WORDS_SUFFIX}.npy", mask_words(col))
+            elif col.dtype.kind in "US":
+                raise ValueError(f"npy output cannot store the text column {name}")
+            else:
+                np.save(path / f"{name}.npy", np.ascontiguousarray(col))
+    return path
+
+
+def append_table(table: Mapping[str, np.ndarray], stem: Path, fmt: str) -> Path:
+    # Row-appending is only supported for csv; the header is written with the first chunk.
+    if fmt != "csv":
+        raise ValueError(f"appending is only supported for csv output, not {fmt}")
+    path = table_path(stem, fmt)
+    exists = path.exists() and path.stat().st_size > 0
+    pd.DataFrame(_flatten(table)).to_csv(path, mode="a", header=not exists, index=False)
+    return path
+
+
+def read_table(
+    stem: Path, fmt: str, mmap: bool = True, matrix_columns: tuple[str, ...] = ()
+) -> Table:
+    path = table_path(stem, fmt)
+    if fmt == "npy":
+        mode = "r" if mmap else None
+        table: Table = {}
+        for p in sorted(path.glob("*.npy")):
+            if p.stem.endswith(_WORDS_SUFFIX):
+                table[p.stem.removesuffix(_WORDS_SUFFIX)] = masks_from_words(np.load(p))
+            else:
+                table[p.stem] = np.load(p, mmap_mode=mode)
+        return table
+    if fmt == "parquet":
+        _, pq = _import_pyarrow()
+        pa_table = pq.read_table(path, memory_map=mmap)
+        flat = _decode_words(
+            {name: pa_table.column(name).to_numpy() for name in pa_table.column_names}
+        )
+    else:
+        df = pd.read_csv(path, float_precision="round_trip")
+        flat = {str(c): df[c].to_numpy() for c in df.columns}
+    return _unflatten(flat, matrix_columns)
+
+
+def iter_table_chunks(
+    path: Path, chunk_rows: int, columns: tuple[str, ...] | None = None
+) -> Iterator[Table]:
+    # Row chunks of a csv or parquet file (by suffix) or an npy table directory, at most
+    # `chunk_rows` rows each.
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows must be positive")
+    cols = list(columns) if columns is not None else None
+    if path.is_dir():
+        mapped: Table = {}
+        for p in sorted(path.glob("*.npy")):
+            name = p.stem.removesuffix(_WORDS_SUFFIX)
+            if cols is None or name in cols:
+                mapped[p.stem] = np.load(p, mmap_mode="r")
+        rows = next(iter(mapped.values())).shape[0] if mapped else 0
+        for start in range(0, rows, chunk_rows):
+            chunk: Table = {}
+            for stem, col in mapped.items():
+                part = col[start : start + chunk_rows]
+                if stem.endswith(_WORDS_SUFFIX):
+                    chunk[stem.removesuffix(_WORDS_SUFFIX)] = masks_from_words(part)
+                else:
+                    chunk[stem] = np.asarray(part)
+            yield chunk
+    elif path.suffix == ".parquet":
+        _, pq = _import_pyarrow()
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=cols):
+            yield {
+                name: batch.column(name).to_numpy(zero_copy_only=False)
+                for name in batch.schema.names
+            }
+    elif path.suffix == ".csv":
+        for df in pd.read_csv(
+            path, usecols=cols, chunksize=chunk_rows, float_precision="round_trip"
+        ):
+            yield {str(c): df[c].to_numpy() for c in df.columns}
+    else:
+        raise ValueError(
+            f"unsupported table file: {path} (expected .csv, .parquet or an npy directory)"
+        )
@@ -0,0 +1,351 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+import numpy as np
+
+from sim_contribution.algorithms import GreedyEngine, build_greedy_engine
+from sim_contribution.coalitions import precompute_coalitions
+from sim_contribution.defaults import DEFAULT_CHECKPOINT_EVERY
+from sim_contribution.instrument import StageTimer
+from sim_contribution.model import ModelConfig, generate_players
+from sim_contribution.noise import CHUNK_VALUES
+from sim_contribution.oracle_cache import OracleCache
+from sim_contribution.policies import PolicyState, resolve_policies
+from sim_contribution.recorder import (
+    TeamMuHistogram,
+    TeamRecorder,
+    add_team_mu,
+    new_team_mu_histogram,
+    new_team_recorder,
+    period_totals,
+    record_teams,
+    samples_frame,
+    summary_frame,
+)
+from sim_contribution.simulate import (
+    EPS_SEED_OFFSET,
+    ModelArtifacts,
+    SimulationBundle,
+    SimulationConfig,
+    initial_policy_state,
+    prepare_artifacts,
+    save_bundle,
+    step_period,
+)
+from sim_contribution.storage import append_table, frame_to_table, table_path
+
+CHECKPOINT_FILE = "checkpoint.npz"
+
+
+@dataclass
+class StreamState:
+    # Everything needed to continue a run after `t` completed periods.
+    t: int
+    policy_states: dict[str, PolicyState]
+    rngs: dict[str, np.random.Generator]
+    noise_rng: np.random.Generator
+
+
+@dataclass(frozen=True)
+class PeriodResult:
+    t: int  # 1-based period
+    team_indices: dict[str, np.ndarray]  # algorithm -> coalition indices fielded in period t
+    totals: dict[str, float]  # algorithm -> sum of mu over its teams
+
+
+def new_stream_state(
+    config: SimulationConfig,
+    artifacts: ModelArtifacts,
+    initial_state: PolicyState | None = None,
+) -> StreamState:
+    policies = resolve_policies(config.algorithms)
+    return StreamState(
+        t=0,
+        policy_states={
+            algo: initial_policy_state(artifacts.coalitions, initial_state) for algo in policies
+        },
+        rngs={
+            algo: np.random.default_rng(config.seed + p.seed_offset) for algo, p in policies.items()
+        },
+        noise_rng=np.random.default_rng(config.seed + EPS_SEED_OFFSET),
+    )
+
+
+def iter_periods(
+    config: SimulationConfig,
+    artifacts: ModelArtifacts,
+    engine: GreedyEngine,
+    state: StreamState,
+    align: int | None = None,
+    timer: StageTimer | None = None,
+) -> Iterator[PeriodResult]:
+    # Advances `state` in place. Noise is drawn in blocks that never cross a multiple of `align`,
+    # so whenever state.t is such a multiple the noise rng holds exactly state.t rows of draws and
+    # the state can be checkpointed. Consecutive blocks reproduce the single (T, m) draw.
+    policies = resolve_policies(config.algorithms)
+    coalitions = artifacts.coalitions
+    m = int(coalitions.masks.shape[0])
+    chunk_periods = max(1, CHUNK_VALUES // max(m, 1))
+
+    while state.t < config.T:
+        rows = min(chunk_periods, config.T - state.t)
+        if align is not None:
+            rows = min(rows, align - state.t % align)
+        start = time.perf_counter()
+        block = state.noise_rng.normal(loc=0.0, scale=config.noise_sigma, size=(rows, m))
+        if timer is not None:
+            timer.add("noise", time.perf_counter() - start)
+        for eps_t in block:
+            teams = step_period(
+                policies,
+                state.policy_states,
+                state.rngs,
+                engine,
+                coalitions,
+                config.n,
+                eps_t,
+                timer,
+            )
+            state.t += 1
+            yield PeriodResult(
+                t=state.t,
+                team_indices=teams,
+                totals={
+                    algo: float(np.cumsum(coalitions.mu[idx])[-1]) for algo, idx in teams.items()
+                },
+            )
+
+
+def _output_stems(out_dir: Path, config: SimulationConfig) -> list[Path]:
+    data = out_dir / "data"
+    kinds = (
+        ("timeseries", "team_mu_samples")
+        if config.team_mu_bins is None
+        else ("timeseries", "team_mu_hist", "team_mu_counts")
+    )
+    return [data / f"{kind}_{algo}" for algo in config.algorithms for kind in kinds]
+
+
+def _save_checkpoint(
+    out_dir: Path,
+    state: StreamState,
+    file_sizes: dict[str, int],
+    histograms: dict[str, TeamMuHistogram] | None = None,
+) -> None:
+    arrays: dict[str, np.ndarray] = {}
+    meta: dict[str, object] = {
+        "t": state.t,
+        "file_sizes": file_sizes,
+        "noise_rng": state.noise_rng.bit_generator.state,
+        "rngs": {algo: rng.bit_generator.state for algo, rng in state.rngs.items()},
+        "policy_t": {algo: ps.t for algo, ps in state.policy_states.items()},
+    }
+    for algo, ps in state.policy_states.items():
+        arrays[f"{algo}/up"] = ps.stats.up.values
+        arrays[f"{algo}/down"] = ps.stats.down.values
+        arrays[f"{algo}/plays"] = ps.plays
+        arrays[f"{algo}/outcome_sum"] = ps.outcome_sum
+    if histograms is not None:
+        # The open team_mu window; closed windows are already in the csv files.
+        meta["team_mu_t_start"] = {algo: h.t_start for algo, h in histograms.items()}
+        for algo, h in histograms.items():
+            arrays[f"{algo}/team_mu_counts"] = h.counts
+    arrays["meta"] = np.array(json.dumps(meta))
+
+    buf = io.BytesIO()
+    np.savez(buf, allow_pickle=False, **arrays)
+    path = out_dir / CHECKPOINT_FILE
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(buf.getvalue())
+    os.replace(tmp, path)
+
+
+def _load_checkpoint(
+    out_dir: Path,
+    state: StreamState,
+    histograms: dict[str, TeamMuHistogram] | None = None,
+) -> dict[str, int]:
+    with np.load(out_dir / CHECKPOINT_FILE) as z:
+        meta = json.loads(str(z["meta"]))
+        for algo, h in (histograms or {}).items():
+            h.counts[:] = z[f"{algo}/team_mu_counts"]
+            h.t_start = int(meta["team_mu_t_start"][algo])
+            h.t = int(meta["t"])
+        for algo, ps in state.policy_states.items():
+            ps.stats.up.values[:] = z[f"{algo}/up"]
+            ps.stats.down.values[:] = z[f"{algo}/down"]
+            ps.plays[:] = z[f"{algo}/plays"]
+            ps.outcome_sum[:] = z[f"{algo}/outcome_sum"]
+            ps.t = int(meta["policy_t"][algo])
+    state.t = int(meta["t"])
+    state.noise_rng.bit_generator.state = meta["noise_rng"]
+    for algo, rng in state.rngs.items():
+        rng.bit_generator.state = meta["rngs"][algo]
+    return {str(k): int(v) for k, v in meta["file_sizes"].items()}
+
+
+def _file_sizes(out_dir: Path, config: SimulationConfig) -> dict[str, int]:
+    sizes: dict[str, int] = {}
+    for stem in _output_stems(out_dir, config):
+        path = table_path(stem, "csv")
+        sizes[path.name] = path.stat().st_size if path.exists() else 0
+    return sizes
+
+
+def _truncate_outputs(out_dir: Path, sizes: dict[str, int]) -> None:
+    # Rows appended after the last checkpoint are dropped; they are regenerated identically.
+    for name, size in sizes.items():
+        path = out_dir / "data" / name
+        if size == 0:
+            path.unlink(missing_ok=True)
+        elif path.exists():
+            with path.open("r+b") as f:
+                f.truncate(size)
+
+
+def _flush(
+    out_dir: Path,
+    artifacts: ModelArtifacts,
+    recorders: dict[str, TeamRecorder],
+    t_offset: int,
+    periods: int,
+    histograms: dict[str, TeamMuHistogram] | None,
+    final: bool,
+) -> None:
+    coalitions = artifacts.coalitions
+    data = out_dir / "data"
+    for algo, full in recorders.items():
+        rec = TeamRecorder(
+            team_index=full.team_index[:periods], team_count=full.team_count[:periods]
+        )
+        totals = period_totals(rec, coalitions.mu)
+        regrets = artifacts.oracle_value - totals
+        upper = artifacts.oracle_upper_bound
+        regrets_upper = upper - totals if upper is not None else None
+        summary = summary_frame(
+            rec, algo, coalitions.mu, totals, regrets, regrets_upper, t_offset=t_offset
+        )
+        append_table(frame_to_table(summary), data / f"timeseries_{algo}", "csv")
+        if histograms is None:
+            samples = samples_frame(rec, algo, coalitions, t_offset=t_offset)
+            append_table(frame_to_table(samples), data / f"team_mu_samples_{algo}", "csv")
+        else:
+            for hist, counts in add_team_mu(histograms[algo], rec, algo, coalitions, final):
+                append_table(frame_to_table(hist), data / f"team_mu_hist_{algo}", "csv")
+                append_table(frame_to_table(counts), data / f"team_mu_counts_{algo}", "csv")
+        full.team_index.fill(-1)
+        full.team_count.fill(0)
+
+
+def load_stream_config(out_dir: Path) -> SimulationConfig:
+    saved = json.loads((out_dir / "config.json").read_text(encoding="utf-8"))
+    if saved.get("output_format", "csv") != "csv":
+        raise ValueError("only csv runs can be resumed")
+    kwargs = {f.name: saved[f.name] for f in fields(SimulationConfig) if f.name in saved}
+    if "algorithms" in kwargs:
+        kwargs["algorithms"] = tuple(kwargs["algorithms"])
+    return SimulationConfig(**kwargs)
+
+
+def _resumed_artifacts(config: SimulationConfig, out_dir: Path) -> ModelArtifacts:
+    # Players and coalitions are cheap to regenerate; the oracle is read back instead of recomputed.
+    model_cfg = ModelConfig(
+        n=config.n, d=config.d, seed=config.seed, noise_sigma=config.noise_sigma
+    )
+    players = generate_players(model_cfg)
+    upper_path = out_dir / "oracle_upper_bound.txt"
+    return ModelArtifacts(
+        players=players,
+        coalitions=precompute_coalitions(players),
+        oracle_value=float((out_dir / "oracle_value.txt").read_text(encoding="utf-8")),
+        oracle_upper_bound=float(upper_path.read_text(encoding="utf-8"))
+        if upper_path.exists()
+        else None,
+    )
+
+
+def _new_histograms(
+    config: SimulationConfig, artifacts: ModelArtifacts
+) -> dict[str, TeamMuHistogram] | None:
+    if config.team_mu_bins is None:
+        return None
+    return {
+        algo: new_team_mu_histogram(
+            artifacts.coalitions, config.team_mu_bins, config.team_mu_window
+        )
+        for algo in config.algorithms
+    }
+
+
+def stream_simulation(
+    config: SimulationConfig,
+    out_dir: Path,
+    checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+    resume: bool = False,
+    oracle_cache: OracleCache | None = None,
+    oracle_workers: int = 1,
+    initial_state: PolicyState | None = None,
+    timer: StageTimer | None = None,
+) -> Iterator[PeriodResult]:
+    # Same outputs as run_simulation + save_bundle(fmt="csv"), but period rows are appended every
+    # `checkpoint_every` periods together with a checkpoint, so a killed run can be resumed with
+    # resume=True and continues bit-identically. The checkpoint already holds any warm start, so
+    # initial_state is ignored on resume.
+    if checkpoint_every <= 0:
+        raise ValueError("checkpoint_every must be positive")
+    if timer is None:
+        timer = StageTimer()
+
+    if resume:
+        if not (out_dir / CHECKPOINT_FILE).exists():
+            raise ValueError(f"no checkpoint to resume in {out_dir}")
+        artifacts = _resumed_artifacts(config, out_dir)
+        state = new_stream_state(config, artifacts)
+        histograms = _new_histograms(config, artifacts)
+        _truncate_outputs(out_dir, _load_checkpoint(out_dir, state, histograms))
+    else:
+        artifacts = prepare_artifacts(config, oracle_cache, timer, oracle_workers)
+        header = SimulationBundle(
+            config=config,
+            players=artifacts.players,
+            coalitions=artifacts.coalitions,
+            oracle_value=artifacts.oracle_value,
+            oracle_upper_bound=artifacts.oracle_upper_bound,
+            eps_seed=config.seed + EPS_SEED_OFFSET,
+            eps=None,
+            results={},
+        )
+        save_bundle(header, out_dir, fmt="csv")
+        for stem in _output_stems(out_dir, config):
+            table_path(stem, "csv").unlink(missing_ok=True)
+        state = new_stream_state(config, artifacts, initial_state)
+        histograms = _new_histograms(config, artifacts)
+        _save_checkpoint(out_dir, state, _file_sizes(out_dir, config), histograms)
+
+    with timer.stage("engine"):
+        engine = build_greedy_engine(artifacts.coalitions)
+    block = min(checkpoint_every, config.T)
+    recorders = {algo: new_team_recorder(block, config.n) for algo in state.policy_states}
+    t_offset = state.t
+
+    for period in iter_periods(config, artifacts, engine, state, checkpoint_every, timer):
+        for algo, team_idx in period.team_indices.items():
+            record_teams(recorders[algo], period.t - 1 - t_offset, team_idx)
+        if period.t % checkpoint_every == 0 or period.t == config.T:
+            final = period.t == config.T
+            periods = period.t - t_offset
+            with timer.stage("summaries"):
+                _flush(out_dir, artifacts, recorders, t_offset, periods, histograms, final)
+            t_offset = period.t
+            with timer.stage("checkpoint"):
+                _save_checkpoint(out_dir, state, _file_sizes(out_dir, config), histograms)
+        yield period
+
+    (out_dir / CHECKPOINT_FILE).unlink(missing_ok=True)
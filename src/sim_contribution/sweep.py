@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import os
+from collections.abc import Mapping
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sim_contribution.defaults import parse_policy_names
+from sim_contribution.oracle_cache import OracleCache
+from sim_contribution.simulate import (
+    AlgorithmResult,
+    ModelArtifacts,
+    SimulationConfig,
+    prepare_artifacts,
+    run_simulation,
+)
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    points: list[SimulationConfig]
+    computed: int  # points that were missing from the cache and ran in this call
+    table: pd.DataFrame  # one row per (point, algorithm)
+
+
+# Bump when simulation changes alter the totals/regrets recorded for an unchanged config.
+SWEEP_CACHE_VERSION = 1
+
+# Fields that only change what a run writes, not the totals/regrets a sweep point records.
+_OUTPUT_FIELDS = ("team_mu_bins", "team_mu_window")
+
+
+def expand_grid(spec: Mapping[str, object]) -> list[SimulationConfig]:
+    known = {f.name for f in fields(SimulationConfig)} - set(_OUTPUT_FIELDS)
+    unknown = set(spec) - known
+    if unknown:
+        raise ValueError(f"unknown grid keys: {', '.join(sorted(unknown))}")
+    missing = {"n", "T", "d", "seed"} - set(spec)
+    if missing:
+        raise ValueError(f"grid must define: {', '.join(sorted(missing))}")
+
+    keys = sorted(spec)
+    axes = [_axis(k, spec[k]) for k in keys]
+    return [_grid_config(dict(zip(keys, combo))) for combo in itertools.product(*axes)]
+
+
+def _grid_int(point: Mapping[str, object], key: str) -> int:
+    value = point[key]
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"grid key {key} must be an integer, not {value!r}")
+    return value
+
+
+def _grid_config(point: Mapping[str, object]) -> SimulationConfig:
+    config = SimulationConfig(
+        n=_grid_int(point, "n"),
+        T=_grid_int(point, "T"),
+        d=_grid_int(point, "d"),
+        seed=_grid_int(point, "seed"),
+    )
+    if "noise_sigma" in point:
+        sigma = point["noise_sigma"]
+        if isinstance(sigma, bool) or not isinstance(sigma, (int, float)):
+            raise ValueError(f"grid key noise_sigma must be a number, not {sigma!r}")
+        config = replace(config, noise_sigma=float(sigma))
+    if "oracle" in point:
+        oracle = point["oracle"]
+        if not isinstance(oracle, str):
+            raise ValueError(f"grid key oracle must be a string, not {oracle!r}")
+        config = replace(config, oracle=oracle)
+    if "algorithms" in point:
+        algorithms = point["algorithms"]
+        # _axis has already parsed every algorithm set into a tuple of names.
+        assert isinstance(algorithms, tuple)
+        config = replace(config, algorithms=tuple(str(a) for a in algorithms))
+    return config
+
+
+def _axis(key: str, value: object) -> list[object]:
+    if key == "algorithms":
+        # "UD,DU" or ["UD", "DU"] is one algorithm set; a list of lists is an axis of sets.
+        if isinstance(value, list) and value and all(isinstance(v, list) for v in value):
+            return [parse_policy_names(v) for v in value]
+        return [parse_policy_names(value)]  # type: ignore[arg-type]
+    return value if isinstance(value, list) else [value]
+
+
+def _point_fields(config: SimulationConfig) -> dict[str, object]:
+    data = asdict(config)
+    for name in _OUTPUT_FIELDS:
+        del data[name]
+    return data
+
+
+def config_key(config: SimulationConfig) -> str:
+    data = _point_fields(config)
+    payload = f"v{SWEEP_CACHE_VERSION}:" + json.dumps(data, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+
+
+def _entry_path(cache_dir: Path, config: SimulationConfig) -> Path:
+    return cache_dir / "points" / f"{config_key(config)}.json"
+
+
+def _write_entry(path: Path, payload: dict[str, object]) -> None:
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _point_rows(
+    config: SimulationConfig,
+    oracle_value: float,
+    oracle_upper_bound: float | None,
+    results: Mapping[str, AlgorithmResult],
+) -> list[dict[str, object]]:
+    tail = max(1, config.T // 10)
+    rows: list[dict[str, object]] = []
+    for algo, res in results.items():
+        rows.append(
+            {
+                "algorithm": algo,
+                "oracle_value": oracle_value,
+                "oracle_upper_bound": oracle_upper_bound
+                if oracle_upper_bound is not None
+                else oracle_value,
+                "total_mean": float(np.mean(res.totals)),
+                "regret_mean": float(np.mean(res.regrets)),
+                "total_last": float(res.totals[-1]),
+                "regret_last": float(res.regrets[-1]),
+                "total_tail_mean": float(np.mean(res.totals[-tail:])),
+                "regret_tail_mean": float(np.mean(res.regrets[-tail:])),
+            }
+        )
+    return rows
+
+
+def _run_point(cache_dir: Path, cfg: SimulationConfig, artifacts: ModelArtifacts) -> int:
+    bundle = run_simulation(cfg, artifacts)
+    payload = {
+        "config": asdict(cfg),
+        "rows": _point_rows(
+            cfg, artifacts.oracle_value, artifacts.oracle_upper_bound, bundle.results
+        ),
+    }
+    _write_entry(_entry_path(cache_dir, cfg), payload)
+    return 1
+
+
+def run_sweep(
+    points: list[SimulationConfig],
+    cache_dir: Path,
+    workers: int = 1,
+    oracle_cache: OracleCache | None = None,
+) -> SweepResult:
+    if workers <= 0:
+        raise ValueError("workers must be positive")
+    (cache_dir / "points").mkdir(parents=True, exist_ok=True)
+
+    unique = list(dict.fromkeys(points))
+    missing = [cfg for cfg in unique if not _entry_path(cache_dir, cfg).exists()]
+
+    groups: dict[tuple[int, int, int, str], list[SimulationConfig]] = {}
+    for cfg in missing:
+        groups.setdefault((cfg.n, cfg.d, cfg.seed, cfg.oracle), []).append(cfg)
+
+    # All configs of a group share (n, d, seed, oracle), so players, coalitions and the oracle are
+    # built once per group; with workers > 1 the groups are prepared in parallel and each point is
+    # then a task of its own with the (picklable) artifacts, so sweeps over T or noise_sigma of a
+    # single model use every worker too.
+    computed = 0
+    if workers <= 1 or len(missing) <= 1:
+        for group in groups.values():
+            artifacts = prepare_artifacts(group[0], oracle_cache)
+            for cfg in group:
+                computed += _run_point(cache_dir, cfg, artifacts)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            prepared = {
+                pool.submit(prepare_artifacts, group[0], oracle_cache): group
+                for group in groups.values()
+            }
+            futures: list[Future[int]] = []
+            for fut in as_completed(prepared):
+                artifacts = fut.result()
+                futures += [
+                    pool.submit(_run_point, cache_dir, cfg, artifacts) for cfg in prepared[fut]
+                ]
+            for fut in futures:
+                computed += fut.result()
+
+    records: list[dict[str, object]] = []
+    for cfg in unique:
+        entry = json.loads(_entry_path(cache_dir, cfg).read_text(encoding="utf-8"))
+        for row in entry["rows"]:
+            records.append(
+                {
+                    **_point_fields(cfg),
+                    "algorithms": ",".join(cfg.algorithms),
+                    "key": config_key(cfg),
+                    **row,
+                }
+            )
+
+    return SweepResult(points=unique, computed=computed, table=pd.DataFrame(records))
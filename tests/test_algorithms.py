@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from sim_contribution.algorithms import (
+    build_greedy_engine,
+    greedy_engine_max,
+    greedy_partition_du,
+    greedy_partition_random,
+    greedy_partition_ud,
+)
+from sim_contribution.coalitions import precompute_coalitions
+from sim_contribution.model import ModelConfig, generate_players
+from sim_contribution.policies import new_policy_state, resolve_policies
+
+
+@pytest.mark.parametrize("n", [1, 4, 9])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_engine_matches_reference(n: int, seed: int) -> None:
+    coalitions = precompute_coalitions(generate_players(ModelConfig(n=n, d=4, seed=seed)))
+    engine = build_greedy_engine(coalitions)
+    policies = resolve_policies(["UD", "DU", "Random"])
+    state = new_policy_state(coalitions)
+    # Small counts so that ties, and with them the rng draws, are common.
+    counts = np.random.default_rng(seed)
+    m = coalitions.masks.shape[0]
+    state.stats.up.values[:] = counts.integers(0, 3, size=m)
+    state.stats.down.values[:] = counts.integers(0, 3, size=m)
+    up, down = state.stats.up, state.stats.down
+    # The reference functions also take dense (1 << n,) lookups.
+    dense_up = np.zeros((1 << n,), dtype=np.int64)
+    dense_down = np.zeros((1 << n,), dtype=np.int64)
+    dense_up[coalitions.masks] = up.values
+    dense_down[coalitions.masks] = down.values
+
+    for t in range(5):
+        cases = [
+            (policies["UD"], greedy_partition_ud(n, up, down, np.random.default_rng(t))),
+            (policies["DU"], greedy_partition_du(n, up, down, np.random.default_rng(t))),
+            (policies["Random"], greedy_partition_random(n, np.random.default_rng(t))),
+        ]
+        assert greedy_partition_ud(n, dense_up, dense_down, np.random.default_rng(t)) == cases[0][1]
+        for policy, ref in cases:
+            rng = np.random.default_rng(t)
+            got = greedy_engine_max(engine, policy.score(coalitions, state, rng), rng)
+            assert got.partition == ref.partition, policy.name
+            assert got.indices is not None
+            assert [int(coalitions.masks[i]) for i in got.indices] == ref.partition
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from sim_contribution.batched import run_replication_batch
+from sim_contribution.defaults import BUILTIN_POLICIES
+from sim_contribution.replicate import run_replications
+from sim_contribution.simulate import SimulationConfig, run_simulation
+
+
+@pytest.mark.parametrize("oracle", ["exact", "approx", "none"])
+def test_batch_matches_run_simulation(oracle: str) -> None:
+    config = SimulationConfig(n=8, T=40, d=4, seed=0, oracle=oracle, algorithms=BUILTIN_POLICIES)
+    seeds = [0, 5, 9]
+    batch = run_replication_batch(config, seeds)
+    for i, seed in enumerate(seeds):
+        single = run_simulation(replace(config, seed=seed))
+        for algo, res in single.results.items():
+            np.testing.assert_array_equal(batch.totals[algo][i], res.totals)
+            np.testing.assert_array_equal(batch.regrets[algo][i], res.regrets)
+
+
+def test_replications_do_not_depend_on_workers() -> None:
+    config = SimulationConfig(n=5, T=30, d=3, seed=0)
+    serial = run_replications(config, range(12), workers=1)
+    pooled = run_replications(config, range(12), workers=3)
+    assert serial.summary.equals(pooled.summary)
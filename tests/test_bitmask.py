@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from sim_contribution.bitmask import lowest_bit_index, lowest_bit_index_array, members_array
+
+
+def test_lowest_bit_index_array() -> None:
+    masks = np.array([1, 2, 12, 1 << 62], dtype=np.int64)
+    assert lowest_bit_index_array(masks).tolist() == [lowest_bit_index(int(m)) for m in masks]
+    wide = np.array([1 << 70, 6], dtype=object)
+    assert lowest_bit_index_array(wide).tolist() == [70, 1]
+    with pytest.raises(ValueError):
+        lowest_bit_index_array(np.array([3, 0]))
+
+
+def test_members_array_matches_object_path() -> None:
+    masks = np.random.default_rng(0).integers(0, 1 << 40, size=500)
+    expected = members_array(masks.astype(object), width=40)
+    assert np.array_equal(members_array(masks, width=40), expected)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from sim_contribution.bench import measure_cli_import
+from sim_contribution.cli import main
+from sim_contribution.defaults import CLI_IMPORT_BUDGET_SECONDS
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+# Slack over the budget for busy machines; `bench --stages import` checks the budget itself.
+IMPORT_HEADROOM = 3.0
+
+
+def test_cli_import_is_light_and_within_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Fresh interpreters, so modules imported by other tests do not count.
+    paths = [str(SRC), *filter(None, [os.environ.get("PYTHONPATH")])]
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join(paths))
+    seconds, loaded = measure_cli_import()
+    assert loaded == []
+    assert seconds <= IMPORT_HEADROOM * CLI_IMPORT_BUDGET_SECONDS
+
+
+def test_profiled_run_keeps_its_error(tmp_path: Path) -> None:
+    out = tmp_path / "new"
+    with pytest.raises(ValueError, match="too large for the oracle DP"):
+        main(["run", "--n", "30", "--profile", "--out", str(out)])
+    assert not out.exists()
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from sim_contribution.coalitions import (
+    CoalitionIndex,
+    coalition_count,
+    coalition_rank,
+    coalition_unrank,
+    enumerate_masks,
+    enumerate_members,
+)
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 7, 12, 64, 70])
+def test_rank_unrank_round_trip(n: int) -> None:
+    members = enumerate_members(n)
+    m = coalition_count(n)
+    assert members.shape[0] == m
+    np.testing.assert_array_equal(coalition_rank(members, n), np.arange(m))
+    np.testing.assert_array_equal(coalition_unrank(np.arange(m), n), members)
+
+
+@pytest.mark.parametrize("n", [5, 64, 70])
+def test_coalition_index_matches_enumeration(n: int) -> None:
+    index = CoalitionIndex(n=n)
+    masks = enumerate_masks(n)
+    assert len(index) == masks.shape[0]
+    step = max(1, masks.shape[0] // 500)
+    for i in range(0, masks.shape[0], step):
+        assert masks[i] in index
+        assert index[int(masks[i])] == i
+    four = 0b1111
+    assert four not in index
+    with pytest.raises(KeyError):
+        index[four]
+    assert (1 << n) not in index
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sim_contribution.coalitions import precompute_coalitions, rank_members
+from sim_contribution.ingest import ingest_log
+from sim_contribution.model import ModelConfig, generate_players
+
+N = 5
+
+
+def _log(rng: np.random.Generator, periods: int) -> pd.DataFrame:
+    rows = []
+    for t in range(1, periods + 1):
+        players = rng.permutation(N).tolist()
+        while players:
+            size = min(int(rng.integers(1, 4)), len(players))
+            team, players = players[:size], players[size:]
+            row: dict[str, object] = {"t": t, "y_team": float(rng.normal())}
+            for j in range(3):
+                row[f"member_{j}"] = team[j] if j < size else -1
+                row[f"y_member_{j}"] = float(rng.normal()) if j < size else np.nan
+            rows.append(row)
+    return pd.DataFrame(rows).sample(frac=1.0, random_state=0)
+
+
+def test_counts_match_hand_built(tmp_path: Path) -> None:
+    coalitions = precompute_coalitions(generate_players(ModelConfig(n=N, d=4, seed=0)))
+    log = _log(np.random.default_rng(0), periods=40)
+    path = tmp_path / "log.csv"
+    log.to_csv(path, index=False)
+
+    m = coalitions.masks.shape[0]
+    plays, outcome = np.zeros(m, dtype=np.int64), np.zeros(m)
+    up, down = np.zeros(m, dtype=np.int64), np.zeros(m, dtype=np.int64)
+    for row in log.to_dict("records"):
+        team = [int(row[f"member_{j}"]) for j in range(3) if int(row[f"member_{j}"]) >= 0]
+        ys = [float(row[f"y_member_{j}"]) for j in range(len(team))]
+        y_team = float(row["y_team"])
+        idx = rank_members(team, N)
+        plays[idx] += 1
+        outcome[idx] += y_team
+        if len(team) > 1:
+            up[idx] += sum(y_team > y for y in ys)
+            down[idx] += sum(y > y_team for y in ys)
+
+    for chunk_rows in (7, len(log)):
+        state = ingest_log(path, coalitions, chunk_rows)
+        assert state.t == 40
+        np.testing.assert_array_equal(state.plays, plays)
+        np.testing.assert_allclose(state.outcome_sum, outcome)
+        np.testing.assert_array_equal(state.stats.up.values, up)
+        np.testing.assert_array_equal(state.stats.down.values, down)
+
+
+@pytest.mark.parametrize("column", ["y_team", "y_member_0"])
+def test_missing_outcomes_are_rejected(column: str, tmp_path: Path) -> None:
+    coalitions = precompute_coalitions(generate_players(ModelConfig(n=N, d=4, seed=0)))
+    log = _log(np.random.default_rng(1), periods=3)
+    log.loc[log.index[0], column] = np.nan
+    path = tmp_path / "log.csv"
+    log.to_csv(path, index=False)
+    with pytest.raises(ValueError, match="outcome"):
+        ingest_log(path, coalitions)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from sim_contribution.coalitions import Coalitions, precompute_coalitions
+from sim_contribution.model import ModelConfig, generate_players
+from sim_contribution.oracle import CHOICE_TABLES, compute_oracle_value, compute_oracle_values
+
+
+def _coalitions(n: int, seed: int) -> Coalitions:
+    return precompute_coalitions(generate_players(ModelConfig(n=n, d=4, seed=seed)))
+
+
+@pytest.mark.parametrize("n", [1, 2, 5, 9])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_vectorized_matches_loop(n: int, seed: int) -> None:
+    coalitions = _coalitions(n, seed)
+    loop = compute_oracle_value(n, coalitions, reconstruct=True, method="loop")
+    vec = compute_oracle_value(n, coalitions, reconstruct=True)
+    assert vec == loop
+
+
+def test_workers_match_serial() -> None:
+    n = 12
+    coalitions = _coalitions(n, 3)
+    ref = compute_oracle_value(n, coalitions, reconstruct=True)
+    assert compute_oracle_value(n, coalitions, reconstruct=True, workers=2) == ref
+    assert compute_oracle_value(n, coalitions, workers=2).value == ref.value
+
+
+@pytest.mark.parametrize("choice_table", CHOICE_TABLES)
+@pytest.mark.parametrize("workers", [1, 2])
+def test_choice_tables_match(choice_table: str, workers: int) -> None:
+    n = 12
+    coalitions = _coalitions(n, 3)
+    ref = compute_oracle_value(n, coalitions, reconstruct=True)
+    got = compute_oracle_value(
+        n, coalitions, reconstruct=True, workers=workers, choice_table=choice_table
+    )
+    assert got == ref
+
+
+def test_float32_dp_is_close() -> None:
+    n = 10
+    coalitions = _coalitions(n, 0)
+    ref = compute_oracle_value(n, coalitions)
+    got = compute_oracle_value(n, coalitions, reconstruct=True, dp_dtype=np.float32)
+    assert got.value == pytest.approx(ref.value, rel=1e-4)
+    assert got.partition is not None
+    assert sum(got.partition) == (1 << n) - 1
+
+
+def test_batched_values_match_single() -> None:
+    n = 7
+    coalitions = _coalitions(n, 0)
+    rng = np.random.default_rng(0)
+    mu = coalitions.mu + rng.normal(0.0, 0.1, size=(4, coalitions.mu.shape[0]))
+    values = compute_oracle_values(n, replace(coalitions, mu=mu))
+    for row, value in zip(mu, values):
+        assert value == compute_oracle_value(n, replace(coalitions, mu=row)).value
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import pytest
+
+from sim_contribution.coalitions import precompute_coalitions
+from sim_contribution.model import ModelConfig, generate_players
+from sim_contribution.oracle import compute_oracle_value
+from sim_contribution.oracle_approx import approximate_oracle
+
+
+@pytest.mark.parametrize("n", [1, 4, 7, 10, 13])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_bounds_bracket_exact_value(n: int, seed: int) -> None:
+    coalitions = precompute_coalitions(generate_players(ModelConfig(n=n, d=4, seed=seed)))
+    exact = compute_oracle_value(n, coalitions).value
+    approx = approximate_oracle(n, coalitions)
+    assert approx.lower_bound is not None and approx.upper_bound is not None
+    tol = 1e-9 * max(1.0, abs(exact))
+    assert approx.lower_bound <= exact + tol
+    assert exact <= approx.upper_bound + tol
+    # The lower bound is the value of the returned partition, which covers every player once.
+    assert approx.partition is not None
+    assert sum(approx.partition) == (1 << n) - 1
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from sim_contribution.oracle import OracleResult
+from sim_contribution.oracle_cache import OracleCache
+
+
+def _result(value: float) -> OracleResult:
+    return OracleResult(value=value, partition=[3, 4], lower_bound=value, upper_bound=value)
+
+
+def test_hit_and_miss(tmp_path: Path) -> None:
+    cache = OracleCache(tmp_path)
+    assert cache.get("a") is None
+    cache.put("a", _result(1.5))
+    assert cache.get("a") == _result(1.5)
+    assert cache.get("b") is None
+
+
+def test_corrupt_entries_are_misses(tmp_path: Path) -> None:
+    cache = OracleCache(tmp_path)
+    for key, text in [
+        ("truncated", '{"value": 1'),
+        ("partial", '{"value": 1.0}\n'),
+        ("list", "[]"),
+    ]:
+        (tmp_path / f"{key}.json").write_text(text, encoding="utf-8")
+        assert cache.get(key) is None
+        assert not (tmp_path / f"{key}.json").exists()
+        cache.put(key, _result(2.0))
+        assert cache.get(key) == _result(2.0)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: Path) -> None:
+    cache = OracleCache(tmp_path)
+    keys = ["k0", "k1", "k2"]
+    for key in keys:
+        cache.put(key, _result(1.0))
+    size = (tmp_path / "k0.json").stat().st_size
+    for age, key in enumerate(reversed(keys), start=1):
+        os.utime(tmp_path / f"{key}.json", (1_000_000 - age, 1_000_000 - age))
+    # Reading k0, the oldest entry, makes it the most recently used one.
+    assert cache.get("k0") is not None
+
+    OracleCache(tmp_path, max_bytes=3 * size).put("k3", _result(1.0))
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == ["k0", "k2", "k3"]
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from sim_contribution.plotting import stream_team_mu_histograms, team_mu_histograms
+from sim_contribution.simulate import SimulationConfig, load_bundle, run_simulation, save_bundle
+from sim_contribution.storage import table_path
+
+
+@pytest.mark.parametrize("fmt", ["csv", "npy", "parquet"])
+def test_streamed_histograms_match_in_memory(fmt: str, tmp_path: Path) -> None:
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    save_bundle(run_simulation(SimulationConfig(n=7, T=120, d=4, seed=1)), tmp_path, fmt=fmt)
+    samples = load_bundle(tmp_path).team_mu_samples
+    paths = {a: table_path(tmp_path / "data" / f"team_mu_samples_{a}", fmt) for a in samples}
+
+    edges, counts = team_mu_histograms(samples)
+    got_edges, got_counts = stream_team_mu_histograms(paths, chunk_rows=37)
+    assert np.array_equal(got_edges, edges)
+    for algo, c in counts.items():
+        assert np.array_equal(got_counts[algo], c)
@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from sim_contribution.defaults import BUILTIN_POLICIES, DEFAULT_POLICIES
+from sim_contribution.policies import POLICIES
+
+
+def test_builtin_names_match_registry() -> None:
+    # defaults cannot import the registry (it stays numpy-free for the CLI), so check it here;
+    # policies registered later by users come after the built-in ones.
+    assert tuple(POLICIES)[: len(BUILTIN_POLICIES)] == BUILTIN_POLICIES
+    assert set(DEFAULT_POLICIES) <= set(BUILTIN_POLICIES)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from sim_contribution.recorder import team_mu_quantiles
+from sim_contribution.simulate import SimulationConfig, run_simulation
+
+QS = np.array([0.0, 0.1, 0.25, 0.5, 0.77, 0.9, 1.0])
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_quantiles_match_expanded_samples(seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    team_mu = rng.normal(size=40)
+    team_mu[::7] = team_mu[0]  # ties
+    count = rng.integers(0, 6, size=40)
+    count[0] = 1
+    expected = np.quantile(np.repeat(team_mu, count), QS)
+    assert np.array_equal(team_mu_quantiles(team_mu, count, QS), expected)
+    assert team_mu_quantiles(team_mu, count, 0.5) == expected[3]
+
+
+def test_quantiles_need_samples() -> None:
+    with pytest.raises(ValueError):
+        team_mu_quantiles(np.array([1.0, 2.0]), np.array([0, 0]), 0.5)
+
+
+def test_run_counts_match_samples() -> None:
+    config = SimulationConfig(n=7, T=130, d=4, seed=2)
+    bins = 10
+    samples = run_simulation(config).results
+    binned = run_simulation(replace(config, team_mu_bins=bins, team_mu_window=33)).results
+    for ref, res in zip(samples.values(), binned.values()):
+        assert ref.team_mu_samples is not None
+        assert res.team_mu_counts is not None and res.team_mu_hist is not None
+        expected = np.quantile(ref.team_mu_samples["team_mu"].to_numpy(), QS)
+        counts = res.team_mu_counts
+        got = team_mu_quantiles(counts["team_mu"].to_numpy(), counts["count"].to_numpy(), QS)
+        assert np.array_equal(got, expected)
+
+        # The histogram alone places each quantile within its bin.
+        # Every window has the same bins; the histogram alone places each quantile in its bin.
+        hist = res.team_mu_hist
+        lo, hi = hist["bin_lo"].to_numpy()[:bins], hist["bin_hi"].to_numpy()[:bins]
+        cum = np.cumsum(hist["count"].to_numpy().reshape(-1, bins).sum(axis=0))
+        for q, value in zip(QS, expected):
+            b = min(np.searchsorted(cum, q * (cum[-1] - 1), side="right"), bins - 1)
+            assert lo[b] <= value <= hi[b]
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from sim_contribution.defaults import OUTPUT_FORMATS
+from sim_contribution.simulate import SimulationConfig, load_bundle, run_simulation, save_bundle
+from sim_contribution.storage import LABEL_COLUMNS
+
+
+@pytest.mark.parametrize("fmt", OUTPUT_FORMATS)
+def test_bundle_round_trip(fmt: str, tmp_path: Path) -> None:
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    bundle = run_simulation(SimulationConfig(n=6, T=30, d=4, seed=1, oracle="approx"))
+    save_bundle(bundle, tmp_path, fmt=fmt)
+    loaded = load_bundle(tmp_path)
+
+    assert loaded.config["output_format"] == fmt
+    assert loaded.oracle_value == bundle.oracle_value
+    assert loaded.oracle_upper_bound == bundle.oracle_upper_bound
+    np.testing.assert_array_equal(loaded.players.skills, bundle.players.skills)
+    np.testing.assert_array_equal(loaded.coalitions["mu"], bundle.coalitions.mu)
+    np.testing.assert_array_equal(loaded.coalitions["members"], bundle.coalitions.members)
+    assert sorted(loaded.timeseries) == sorted(bundle.results)
+    for algo, res in bundle.results.items():
+        for name in res.summary.columns:
+            if name in LABEL_COLUMNS and fmt == "npy":
+                continue
+            np.testing.assert_array_equal(loaded.timeseries[algo][name], res.summary[name])
+        assert res.team_mu_samples is not None
+        np.testing.assert_array_equal(
+            loaded.team_mu_samples[algo]["team_mu"], res.team_mu_samples["team_mu"]
+        )
+
+
+@pytest.mark.parametrize("fmt", OUTPUT_FORMATS)
+@pytest.mark.parametrize("n", [64, 70])
+def test_wide_masks_round_trip(fmt: str, n: int, tmp_path: Path) -> None:
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    bundle = run_simulation(SimulationConfig(n=n, T=5, d=3, seed=0, oracle="none"))
+    save_bundle(bundle, tmp_path, fmt=fmt)
+    loaded = load_bundle(tmp_path)
+    assert [int(m) for m in loaded.coalitions["mask"]] == [int(m) for m in bundle.coalitions.masks]
+    np.testing.assert_array_equal(loaded.coalitions["members"], bundle.coalitions.members)
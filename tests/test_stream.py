@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import filecmp
+from pathlib import Path
+
+import pytest
+
+from sim_contribution.defaults import BUILTIN_POLICIES
+from sim_contribution.simulate import SimulationConfig, run_simulation, save_bundle
+from sim_contribution.stream import load_stream_config, stream_simulation
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        SimulationConfig(n=7, T=130, d=4, seed=2, algorithms=BUILTIN_POLICIES),
+        SimulationConfig(n=7, T=130, d=4, seed=2, oracle="approx"),
+        SimulationConfig(n=7, T=130, d=4, seed=2, team_mu_bins=10, team_mu_window=33),
+    ],
+)
+def test_resumed_stream_matches_run(config: SimulationConfig, tmp_path: Path) -> None:
+    ref = tmp_path / "ref"
+    out = tmp_path / "stream"
+    save_bundle(run_simulation(config), ref)
+
+    # Stop mid-run, as if killed; the last checkpoint is at t=50.
+    for period in stream_simulation(config, out, checkpoint_every=25):
+        if period.t == 61:
+            break
+    for _ in stream_simulation(load_stream_config(out), out, checkpoint_every=25, resume=True):
+        pass
+
+    names = sorted(p.name for p in (ref / "data").iterdir())
+    assert sorted(p.name for p in (out / "data").iterdir()) == names
+    for name in names:
+        assert filecmp.cmp(ref / "data" / name, out / "data" / name, shallow=False), name
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from sim_contribution.sweep import config_key, expand_grid, run_sweep
+
+GRID = {"n": [4, 5], "T": 10, "d": 3, "seed": [0, 1]}
+
+
+def test_cached_points_are_reused(tmp_path: Path) -> None:
+    points = expand_grid(GRID)
+    first = run_sweep(points, tmp_path)
+    assert first.computed == len(points)
+
+    again = run_sweep(points, tmp_path)
+    assert again.computed == 0
+    assert again.table.equals(first.table)
+
+    extended = expand_grid({**GRID, "seed": [0, 1, 2]})
+    assert run_sweep(extended, tmp_path).computed == len(extended) - len(points)
+
+
+def test_parallel_sweep_matches_serial(tmp_path: Path) -> None:
+    points = expand_grid(GRID)
+    serial = run_sweep(points, tmp_path / "serial")
+    parallel = run_sweep(points, tmp_path / "parallel", workers=2)
+    assert parallel.table.equals(serial.table)
+
+
+def test_key_covers_algorithms() -> None:
+    base = expand_grid({**GRID, "algorithms": "UD,DU,Random"})[0]
+    other = expand_grid({**GRID, "algorithms": "UD"})[0]
+    assert config_key(base) != config_key(other)